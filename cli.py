@@ -1,522 +1,642 @@
 #!/usr/bin/env python3
-import argparse
+import functools
+import itertools
+import os
 import sys
-from typing import List, Optional
-import json
+from types import SimpleNamespace
+from typing import List, Optional, TYPE_CHECKING
 
-from config import Config
-from readwise_client import ReadwiseClient
-from document_manager import DocumentManager, safe_print
-from tag_manager import TagManager
-from document_deduplicator import DocumentDeduplicator, ADVANCED_RULE_SENTENCE
+# Only lightweight names are imported at module level. The API client (and
+# with it `requests`) is imported by ReadwiseCLI on first use so that `-h`
+# and argparse errors never pay for it; document_deduplicator (re, difflib)
+# is only imported by the duplicate commands that use it.
+from document_manager import (LOCATIONS, safe_print, safe_write, prompt_line, confirm_key,
+                              write_json, write_ndjson)
+
+if TYPE_CHECKING:
+    import argparse
+
+# Shared argparse choices, allocated once and reused by every subparser.
+# Tuples rather than sets so help and error output keep a stable order.
+FORMATS = ('text', 'json')
+
+# Text output is joined and written this many entries at a time, which keeps
+# writes few without building one string for the whole result set.
+OUTPUT_BATCH_SIZE = 1024
+
+
+def parse_tags(value: str) -> tuple:
+    """argparse type for comma-separated tags: strip each tag and drop empty ones"""
+    return tuple(tag for tag in (t.strip() for t in value.split(',')) if tag)
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts such as --jobs: an integer of at least 1"""
+    number = int(value)
+    if number < 1:
+        import argparse
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def similarity_threshold(value: str) -> float:
+    """argparse type for similarity thresholds such as --near-threshold: 0 < value <= 1"""
+    number = float(value)
+    if not 0 < number <= 1:
+        import argparse
+        raise argparse.ArgumentTypeError(f"must be greater than 0 and at most 1, got {value}")
+    return number
+
+
+def _plan_entry(action: str, doc: dict) -> str:
+    """plan-deletion --verbose lines for one KEEP/DELETE row of the plan"""
+    return (
+        f"  {action}: {doc.get('title', 'No title')[:50]}...\n"
+        f"    ID: {doc.get('id', 'N/A')}\n"
+        f"    Notes: {'Yes' if doc.get('notes', '').strip() else 'No'}\n"
+        f"    Tags: {'Yes' if doc.get('tags', '').strip() else 'No'}\n"
+        f"    Created: {doc.get('created_at', 'N/A')}\n"
+    )
+
+
+def bulk_output(method):
+    """Run a command that prints many lines with stdout line buffering turned off,
+    so a terminal is not flushed per line, and flush once when it returns"""
+    @functools.wraps(method)
+    def wrapper(self, args):
+        stream = sys.stdout
+        relax = getattr(stream, 'line_buffering', False) and hasattr(stream, 'reconfigure')
+        if relax:
+            stream.reconfigure(line_buffering=False)
+        try:
+            return method(self, args)
+        finally:
+            if relax:
+                stream.reconfigure(line_buffering=True)
+            stream.flush()
+    return wrapper
+
+
+# How long a successful token verification is reused by regular commands.
+VERIFY_CACHE_SECONDS = 3600
+
+# How long `tags` / `tag-stats` reuse the tag list cached on disk.
+TAG_CACHE_SECONDS = 3600
 
 class ReadwiseCLI:
     """Readwise command line interface"""
     
     def __init__(self):
+        from config import Config
+
         try:
             self.config = Config()
-            self.client = ReadwiseClient(self.config)
-            self.doc_manager = DocumentManager(self.client)
-            self.tag_manager = TagManager(self.client)
-            self.deduplicator = DocumentDeduplicator(self.client)
         except ValueError as e:
             print(f"Error: {e}")
             sys.exit(1)
     
-    def verify_connection(self) -> bool:
-        """Verify API connection"""
-        if not self.client.verify_token():
+    # Collaborators are built on first access, so a command only constructs
+    # what it touches (e.g. setup-token never builds a manager).
+    @functools.cached_property
+    def client(self):
+        from readwise_client import ReadwiseClient
+        return ReadwiseClient(self.config)
+    
+    @functools.cached_property
+    def doc_manager(self):
+        from document_manager import DocumentManager
+        return DocumentManager(self.client)
+    
+    @functools.cached_property
+    def tag_manager(self):
+        from tag_manager import TagManager
+        return TagManager(self.client)
+    
+    @functools.cached_property
+    def deduplicator(self):
+        from document_deduplicator import DocumentDeduplicator
+        return DocumentDeduplicator(self.client)
+    
+    def verify_connection(self, max_age: Optional[float] = None) -> bool:
+        """Verify API connection, reusing a verification younger than max_age seconds"""
+        if not self.client.verify_token(max_age=max_age):
             print("Error: API token invalid or network connection failed")
             return False
         return True
     
     def add_article(self, args) -> None:
         """Add article"""
-        tags = args.tags.split(',') if args.tags else None
+        # --tags is already split and stripped by parse_tags at parse time
+        tags = args.tags or None
         
-        try:
-            result = self.doc_manager.add_article(
-                url=args.url,
-                title=args.title,
-                tags=tags,
-                location=args.location
-            )
-            print(f"Successfully added article: {result.get('url')}")
-        except Exception as e:
-            print(f"Failed to add article: {e}")
+        result = self.doc_manager.add_article(
+            url=args.url,
+            title=args.title,
+            tags=tags,
+            location=args.location
+        )
+        print(f"Successfully added article: {result.get('url')}")
     
+    @bulk_output
     def list_documents(self, args) -> None:
         """List documents"""
-        try:
-            docs = self.doc_manager.get_documents(
-                location=args.location,
-                category=args.category,
-                limit=args.limit,
-                show_progress=not args.no_progress
+        # Pages are consumed as they arrive: ndjson and csv stream them straight
+        # out, and text only holds enough documents to decide on the CSV fallback
+        pages = self.doc_manager.iter_documents(
+            location=args.location,
+            category=args.category,
+            limit=args.limit,
+            show_progress=not args.no_progress
+        )
+        first_page = next((page for page in pages if page), None)
+        if first_page is None:
+            print("No documents found matching criteria")
+            return
+        docs = itertools.chain(first_page, itertools.chain.from_iterable(pages))
+        
+        if args.format == 'json':
+            # The array needs every document, but the encoded text is streamed
+            write_json(list(docs))
+            return
+        if args.format == 'ndjson':
+            # One call per page so progress output and documents stay in order
+            write_ndjson(first_page)
+            for page in pages:
+                write_ndjson(page)
+            return
+        if args.format == 'csv':
+            csv_filename = self.doc_manager.export_documents_to_csv(docs)
+            print(f"📁 Documents exported to CSV: {csv_filename}")
+            return
+        
+        # Auto-export to CSV if more than 200 documents and not explicitly requesting JSON
+        head = list(itertools.islice(docs, 201))
+        if len(head) > 200:
+            print("Found more than 200 documents. Auto-exporting to CSV for better handling...")
+            csv_filename = self.doc_manager.export_documents_to_csv(itertools.chain(head, docs))
+            print(f"📁 Complete document metadata saved to: {csv_filename}")
+            print(f"💡 Use --format json, --format ndjson or --limit 200 to see results in terminal")
+            return
+        
+        # At most 200 documents reach this point, so their lines go out in
+        # one write instead of five print() calls per document.
+        parts = []
+        for i, doc in enumerate(head, 1):
+            parts.append(
+                f"\n{i}. {doc.get('title', 'N/A')}\n"
+                f"   ID: {doc.get('id')}\n"
+                f"   URL: {doc.get('source_url', doc.get('url', 'N/A'))}\n"
+                f"   Location: {doc.get('location', 'N/A')}\n"
+                f"   Updated: {doc.get('updated_at', 'N/A')}\n"
             )
             
-            if not docs:
-                print("No documents found matching criteria")
-                return
-            
-            # Auto-export to CSV if more than 200 documents and not explicitly requesting JSON
-            if len(docs) > 200 and args.format != 'json':
-                print(f"Found {len(docs)} documents (>200). Auto-exporting to CSV for better handling...")
-                csv_filename = self.doc_manager.export_documents_to_csv(docs)
-                print(f"📁 Complete document metadata saved to: {csv_filename}")
-                print(f"💡 Use --format json or --limit 200 to see results in terminal")
-                return
-            
-            if args.format == 'json':
-                print(json.dumps(docs, ensure_ascii=False, indent=2))
-            elif args.format == 'csv':
-                csv_filename = self.doc_manager.export_documents_to_csv(docs)
-                print(f"📁 Documents exported to CSV: {csv_filename}")
-            else:
-                for i, doc in enumerate(docs, 1):
-                    safe_print(f"\n{i}. {doc.get('title', 'N/A')}")
-                    print(f"   ID: {doc.get('id')}")
-                    print(f"   URL: {doc.get('source_url', doc.get('url', 'N/A'))}")
-                    print(f"   Location: {doc.get('location', 'N/A')}")
-                    print(f"   Updated: {doc.get('updated_at', 'N/A')}")
-                    
-                    if args.verbose:
-                        self.doc_manager.display_document_summary(doc)
-                        
-        except Exception as e:
-            print(f"Failed to list documents: {e}")
+            if args.verbose:
+                safe_write(''.join(parts))
+                parts.clear()
+                self.doc_manager.display_document_summary(doc)
+        safe_write(''.join(parts))
     
+    @bulk_output
     def search_documents(self, args) -> None:
         """Search documents"""
-        try:
-            docs = self.doc_manager.search_documents(
-                keyword=args.keyword,
-                location=args.location
+        docs = self.doc_manager.search_documents(
+            keyword=args.keyword,
+            location=args.location
+        )
+        
+        if not docs:
+            print(f"No documents found containing '{args.keyword}'")
+            return
+        
+        if args.format == 'json':
+            write_json(docs)
+            return
+        if args.format == 'ndjson':
+            write_ndjson(docs)
+            return
+        
+        parts = []
+        for i, doc in enumerate(docs, 1):
+            parts.append(
+                f"\n{i}. {doc.get('title', 'N/A')}\n"
+                f"   ID: {doc.get('id')}\n"
+                f"   URL: {doc.get('source_url', doc.get('url', 'N/A'))}\n"
             )
-            
-            if not docs:
-                print(f"No documents found containing '{args.keyword}'")
-                return
-            
-            for i, doc in enumerate(docs, 1):
-                safe_print(f"\n{i}. {doc.get('title', 'N/A')}")
-                print(f"   ID: {doc.get('id')}")
-                print(f"   URL: {doc.get('source_url', doc.get('url', 'N/A'))}")
-                
-        except Exception as e:
-            print(f"Failed to search documents: {e}")
+            if len(parts) >= OUTPUT_BATCH_SIZE:
+                safe_write(''.join(parts))
+                parts.clear()
+        safe_write(''.join(parts))
     
     def update_document(self, args) -> None:
         """Update document"""
-        try:
-            if args.location:
-                result = self.doc_manager.move_document(args.id, args.location)
-                print(f"Document moved to {args.location}")
-            else:
-                result = self.doc_manager.update_document_metadata(
-                    document_id=args.id,
-                    title=args.title,
-                    author=args.author,
-                    summary=args.summary
-                )
-                print("Document metadata updated")
-                
-        except Exception as e:
-            print(f"Failed to update document: {e}")
+        if len(args.id) > 1:
+            if not args.location or args.title or args.author or args.summary:
+                raise ValueError("several document IDs can only be moved with --location")
+            self.doc_manager.move_documents(args.id, args.location)
+        elif args.location:
+            result = self.doc_manager.move_document(args.id[0], args.location)
+            print(f"Document moved to {args.location}")
+        else:
+            result = self.doc_manager.update_document_metadata(
+                document_id=args.id[0],
+                title=args.title,
+                author=args.author,
+                summary=args.summary
+            )
+            print("Document metadata updated")
     
     def delete_document(self, args) -> None:
         """Delete document"""
+        target = f"document {args.id[0]}" if len(args.id) == 1 else f"{len(args.id)} documents"
         if not args.force:
-            confirm = input(f"Are you sure you want to delete document {args.id}? (y/N): ")
-            if confirm.lower() != 'y':
+            # Piped or scripted runs must opt in with --force rather than have
+            # a confirmation line consumed from their input
+            if not sys.stdin.isatty():
+                raise ValueError(f"refusing to delete {target} non-interactively without --force")
+            if not confirm_key(f"Are you sure you want to delete {target}? (y/N): "):
                 print("Delete cancelled")
                 return
         
-        try:
-            success = self.doc_manager.delete_document(args.id)
-            if success:
-                print("Document deleted")
-            else:
-                print("Delete failed")
-        except Exception as e:
-            print(f"Failed to delete document: {e}")
+        if len(args.id) > 1:
+            self.doc_manager.delete_documents(args.id)
+            return
+        success = self.doc_manager.delete_document(args.id[0])
+        if success:
+            print("Document deleted")
+        else:
+            print("Delete failed")
     
     def show_stats(self, args) -> None:
         """Show statistics"""
-        try:
-            stats = self.doc_manager.get_stats()
-            
-            print("\n=== Document Statistics ===")
-            print(f"Total: {stats['total']}")
-            print(f"New: {stats['new']}")
-            print(f"Later: {stats['later']}")
-            print(f"Archive: {stats['archive']}")
-            print(f"Feed: {stats['feed']}")
-            
-            if args.include_tags:
-                self.tag_manager.display_tag_stats()
-                
-        except Exception as e:
-            print(f"Failed to get statistics: {e}")
+        stats = self.doc_manager.get_stats()
+        
+        print("\n=== Document Statistics ===")
+        print(f"Total: {stats['total']}")
+        print(f"New: {stats['new']}")
+        print(f"Later: {stats['later']}")
+        print(f"Archive: {stats['archive']}")
+        print(f"Feed: {stats['feed']}")
+        
+        if args.include_tags:
+            self.tag_manager.display_tag_stats()
     
     def export_documents(self, args) -> None:
         """Export documents"""
-        try:
-            filename = self.doc_manager.export_documents(
-                location=args.location,
-                filename=args.output
-            )
-            print(f"Documents exported to: {filename}")
-        except Exception as e:
-            print(f"Export failed: {e}")
+        filename = self.doc_manager.export_documents(
+            location=args.location,
+            filename=args.output,
+            output_format=args.format,
+            compress=args.gzip
+        )
+        print(f"Documents exported to: {filename}")
     
+    @bulk_output
     def list_tags(self, args) -> None:
         """List tags"""
-        try:
-            if args.search:
-                tags = self.tag_manager.search_tags(args.search)
-            else:
-                tags = self.tag_manager.list_tags(sort_by=args.sort)
-            
-            if not tags:
-                print("No tags found")
-                return
-            
-            if args.format == 'json':
-                print(json.dumps(tags, ensure_ascii=False, indent=2))
-            else:
-                for i, tag in enumerate(tags, 1):
-                    print(f"{i}. {tag.get('name')} (key: {tag.get('key')})")
-                    
-                    if args.verbose:
-                        self.tag_manager.display_tag_summary(tag)
-                        
-        except Exception as e:
-            print(f"Failed to list tags: {e}")
+        self.tag_manager.cache_max_age = 0 if args.refresh else args.ttl
+        if args.search:
+            tags = self.tag_manager.search_tags(args.search)
+        else:
+            tags = self.tag_manager.list_tags(sort_by=args.sort)
+        
+        if not tags:
+            print("No tags found")
+            return
+        
+        if args.format == 'json':
+            write_json(tags)
+        elif args.format == 'ndjson':
+            write_ndjson(tags)
+        else:
+            parts = []
+            for i, tag in enumerate(tags, 1):
+                parts.append(f"{i}. {tag.get('name')} (key: {tag.get('key')})\n")
+                
+                if args.verbose or len(parts) >= OUTPUT_BATCH_SIZE:
+                    safe_write(''.join(parts))
+                    parts.clear()
+                if args.verbose:
+                    self.tag_manager.display_tag_summary(tag)
+            safe_write(''.join(parts))
     
     def tag_stats(self, args) -> None:
         """Tag statistics"""
-        try:
-            self.tag_manager.display_tag_stats()
-        except Exception as e:
-            print(f"Failed to get tag statistics: {e}")
+        self.tag_manager.cache_max_age = 0 if args.refresh else args.ttl
+        self.tag_manager.display_tag_stats()
     
+    @bulk_output
     def analyze_duplicates(self, args) -> None:
         """Analyze duplicate documents without deletion"""
-        try:
-            safe_print("Starting duplicate analysis...")
-            
-            # Get documents based on parameters
-            documents = None
-            if args.location or args.limit:
-                documents = self.doc_manager.get_documents(
-                    location=args.location, 
-                    limit=args.limit
-                )
-                if args.limit:
-                    safe_print(f"Processing limited to {args.limit} documents")
-            
-            analysis = self.deduplicator.analyze_duplicates(documents)
-            
-            if analysis.get("error"):
-                print(f"Analysis failed: {analysis['error']}")
-                return
-            
-            if analysis["duplicate_groups"] == 0:
-                safe_print("No duplicate documents found")
-                if args.limit:
-                    safe_print("Note: Analysis was limited - try without --limit for complete results")
-                return
-            
-            # Display analysis results
-            safe_print(f"\n=== Duplicate Document Analysis Results ===")
-            safe_print(f"Total documents: {analysis['total_documents']}")
+        safe_print("Starting duplicate analysis...")
+        
+        # Get documents based on parameters
+        documents = None
+        if args.location or args.limit:
+            # Pages are consumed lazily; the deduplicator keeps only the fields it needs
+            documents = itertools.chain.from_iterable(self.doc_manager.iter_documents(
+                location=args.location,
+                limit=args.limit
+            ))
             if args.limit:
-                safe_print(f"(Limited to {args.limit} documents - use without --limit for complete analysis)")
-            safe_print(f"Duplicate groups: {analysis['duplicate_groups']}")
-            safe_print(f"Duplicates to remove: {analysis['total_duplicates']}")
-            
-            if args.format == 'json':
-                print(json.dumps(analysis, ensure_ascii=False, indent=2))
-            else:
-                for group in analysis["groups"]:
-                    safe_print(f"\n--- Group {group['group_id']} ---")
-                    safe_print(f"Keep document: {group['best_document']['title'][:60]}...")
-                    safe_print(f"  ID: {group['best_document']['id']}")
-                    safe_print(f"  Quality score: {group['best_document']['quality_score']:.1f}")
-                    safe_print(f"  Author: {group['best_document']['author'] or 'N/A'}")
-                    safe_print(f"  Location: {group['best_document']['location']}")
-                    
-                    safe_print(f"Will remove {len(group['duplicates_to_remove'])} duplicate documents:")
-                    for dup in group["duplicates_to_remove"]:
-                        safe_print(f"  - {dup['title'][:60]}... (score: {dup['quality_score']:.1f})")
-            
-            # Export report
-            if args.export:
-                filename = self.deduplicator.export_analysis_report(analysis, args.export)
-                
-        except Exception as e:
-            print(f"Analysis failed: {e}")
+                safe_print(f"Processing limited to {args.limit} documents")
+        elif args.jobs > 1:
+            documents = self.doc_manager.get_documents_by_location(jobs=args.jobs)
+        
+        near_threshold = args.near_threshold if args.near_duplicates else None
+        analysis = self.deduplicator.analyze_duplicates(documents, near_threshold=near_threshold)
+        
+        if analysis.get("error"):
+            print(f"Analysis failed: {analysis['error']}")
+            return
+        
+        if analysis["duplicate_groups"] == 0:
+            safe_print("No duplicate documents found")
+            if args.limit:
+                safe_print("Note: Analysis was limited - try without --limit for complete results")
+            return
+        
+        # Display analysis results
+        safe_print(f"\n=== Duplicate Document Analysis Results ===")
+        safe_print(f"Total documents: {analysis['total_documents']}")
+        if args.limit:
+            safe_print(f"(Limited to {args.limit} documents - use without --limit for complete analysis)")
+        safe_print(f"Duplicate groups: {analysis['duplicate_groups']}")
+        safe_print(f"Duplicates to remove: {analysis['total_duplicates']}")
+        
+        if args.format == 'json':
+            write_json(analysis)
+        else:
+            parts = []
+            for group in analysis["groups"]:
+                best = group['best_document']
+                parts.append(
+                    f"\n--- Group {group['group_id']} ---\n"
+                    f"Keep document: {best['title'][:60]}...\n"
+                    f"  ID: {best['id']}\n"
+                    f"  Quality score: {best['quality_score']:.1f}\n"
+                    f"  Author: {best['author'] or 'N/A'}\n"
+                    f"  Location: {best['location']}\n"
+                    f"Will remove {len(group['duplicates_to_remove'])} duplicate documents:\n"
+                )
+                for dup in group["duplicates_to_remove"]:
+                    parts.append(f"  - {dup['title'][:60]}... (score: {dup['quality_score']:.1f})\n")
+                if len(parts) >= OUTPUT_BATCH_SIZE:
+                    safe_write(''.join(parts))
+                    parts.clear()
+            safe_write(''.join(parts))
+        
+        # Export report
+        if args.export:
+            filename = self.deduplicator.export_analysis_report(analysis, args.export)
     
     def remove_duplicates(self, args) -> None:
         """Execute deduplication operation"""
-        try:
-            safe_print("Starting deduplication process...")
-            
-            # Get documents based on parameters
-            documents = None
-            if args.location or args.limit:
-                documents = self.doc_manager.get_documents(
-                    location=args.location,
-                    limit=args.limit
-                )
-                if args.limit:
-                    safe_print(f"Processing limited to {args.limit} documents")
-            
-            result = self.deduplicator.remove_duplicates(
-                documents=documents,
-                dry_run=args.dry_run,
-                auto_confirm=args.force
-            )
-            
-            if result.get("error"):
-                print(f"Deduplication failed: {result['error']}")
-                return
-            
-            if result.get("message"):
-                safe_print(result["message"])
-                if args.limit and "No duplicate documents found" in result["message"]:
-                    safe_print("Note: Processing was limited - try without --limit for complete results")
-                return
-            
-            # Display results
-            if result.get("dry_run"):
-                safe_print("\n*** This is preview mode, no documents were actually deleted ***")
-                safe_print("Use --execute parameter to perform actual deletion")
-            else:
-                safe_print(f"\n=== Deduplication Complete ===")
-                safe_print(f"Successfully deleted: {result.get('removed_count', 0)} duplicate documents")
-                if result.get("failed_deletions"):
-                    safe_print(f"Failed to delete: {len(result['failed_deletions'])} documents")
-            
-            # Export report
-            if args.export and result.get("analysis"):
-                filename = self.deduplicator.export_analysis_report(result["analysis"], args.export)
-                
-        except Exception as e:
-            print(f"Deduplication failed: {e}")
+        if not args.dry_run and not args.force and not sys.stdin.isatty():
+            # Checked before fetching, so a scripted run fails fast instead of
+            # waiting for a confirmation line that would come from its input
+            raise ValueError("refusing to delete duplicates non-interactively without --force")
+        safe_print("Starting deduplication process...")
+        
+        # Get documents based on parameters
+        documents = None
+        if args.location or args.limit:
+            # Pages are consumed lazily; the deduplicator keeps only the fields it needs
+            documents = itertools.chain.from_iterable(self.doc_manager.iter_documents(
+                location=args.location,
+                limit=args.limit
+            ))
+            if args.limit:
+                safe_print(f"Processing limited to {args.limit} documents")
+        elif args.jobs > 1:
+            documents = self.doc_manager.get_documents_by_location(jobs=args.jobs)
+        
+        result = self.deduplicator.remove_duplicates(
+            documents=documents,
+            dry_run=args.dry_run,
+            auto_confirm=args.force,
+            delete_concurrency=args.delete_concurrency
+        )
+        
+        if result.get("error"):
+            print(f"Deduplication failed: {result['error']}")
+            return
+        
+        if result.get("message"):
+            safe_print(result["message"])
+            if args.limit and "No duplicate documents found" in result["message"]:
+                safe_print("Note: Processing was limited - try without --limit for complete results")
+            return
+        
+        # Display results
+        if result.get("dry_run"):
+            safe_print("\n*** This is preview mode, no documents were actually deleted ***")
+            safe_print("Use --execute parameter to perform actual deletion")
+        else:
+            safe_print(f"\n=== Deduplication Complete ===")
+            safe_print(f"Successfully deleted: {result.get('removed_count', 0)} duplicate documents")
+            if result.get("failed_deletions"):
+                safe_print(f"Failed to delete: {len(result['failed_deletions'])} documents")
+        
+        # Export report
+        if args.export and result.get("analysis"):
+            filename = self.deduplicator.export_analysis_report(result["analysis"], args.export)
     
+    @bulk_output
     def analyze_csv_duplicates(self, args) -> None:
         """Analyze duplicates in CSV file based on source_url"""
-        from document_deduplicator import DocumentDeduplicator
+        from document_deduplicator import ADVANCED_RULE_SENTENCE
         
-        try:
-            safe_print("Initializing CSV duplicate analyzer...")
-            deduplicator = DocumentDeduplicator(self.client)
-            
-            # Resolve analysis mode. --mode wins; --advanced is kept as a
-            # backward-compatible alias that maps to --mode advanced.
-            mode = getattr(args, 'mode', None)
-            if not mode:
-                mode = 'advanced' if getattr(args, 'advanced', False) else 'standard'
-
-            if mode == 'advanced':
-                safe_print("🔍 Using ADVANCED mode - Smart URL + title similarity matching")
-                safe_print(f"⚠️  Rule (either side alone flags a duplicate): {ADVANCED_RULE_SENTENCE}")
-                safe_print("")
-                safe_print("This mode is smarter but please review results carefully!")
-                safe_print("")
-                analysis = deduplicator.find_csv_duplicates_advanced(args.csv_file)
-            elif mode == 'intermediate':
-                safe_print("🔍 Using INTERMEDIATE mode - URL match ignoring query strings")
-                safe_print("Rule: documents with the same URL after stripping query string + fragment are grouped")
-                safe_print("Title similarity is NOT considered.")
-                safe_print("")
-                analysis = deduplicator.find_csv_duplicates_intermediate(args.csv_file)
-            else:
-                # Standard analysis
-                analysis = deduplicator.find_csv_duplicates(args.csv_file)
-            
-            if analysis.get("error"):
-                safe_print(f"Error: {analysis['error']}")
-                return
-            
-            # Display results
-            safe_print(f"\n=== CSV Duplicate Analysis Results ===")
-            safe_print(f"CSV file: {analysis['csv_file']}")
-            safe_print(f"Total documents: {analysis['total_documents']}")
-            safe_print(f"Duplicate groups: {analysis['duplicate_groups']}")
-            safe_print(f"Total duplicates: {analysis['total_duplicates']}")
-            
-            if analysis['duplicate_groups'] == 0:
-                safe_print("No duplicate documents found based on source_url")
-                return
-            
-            # Show detailed groups if requested
-            if args.verbose:
-                safe_print(f"\n=== Duplicate Groups ===")
-                for i, group in enumerate(analysis['groups'], 1):
-                    safe_print(f"\nGroup {i}: {group['normalized_url']}")
-                    safe_print(f"  {group['count']} documents with same normalized URL:")
-                    for doc_info in group['documents']:
-                        data = doc_info['data']
-                        title = data.get('title', 'No title')[:50]
-                        safe_print(f"    Row {doc_info['row_number']}: {title}...")
-            
-            # Export duplicate list to CSV
-            if args.export:
-                output_file = args.export
-            else:
-                output_file = None
-            
-            csv_file = deduplicator.export_csv_duplicates(analysis, output_file)
-            if csv_file:
-                safe_print(f"\nDuplicate list saved to: {csv_file}")
-            
-        except Exception as e:
-            safe_print(f"Error during CSV duplicate analysis: {e}")
-            import traceback
-            traceback.print_exc()
+        safe_print("Initializing CSV duplicate analyzer...")
+        deduplicator = self.deduplicator
+        
+        # Resolve analysis mode. --mode wins; --advanced is kept as a
+        # backward-compatible alias that maps to --mode advanced.
+        mode = getattr(args, 'mode', None)
+        if not mode:
+            mode = 'advanced' if getattr(args, 'advanced', False) else 'standard'
 
+        if mode == 'advanced':
+            safe_print("🔍 Using ADVANCED mode - Smart URL + title similarity matching")
+            safe_print(f"⚠️  Rule (either side alone flags a duplicate): {ADVANCED_RULE_SENTENCE}")
+            safe_print("")
+            safe_print("This mode is smarter but please review results carefully!")
+            safe_print("")
+            analysis = deduplicator.find_csv_duplicates_advanced(args.csv_file)
+        elif mode == 'intermediate':
+            safe_print("🔍 Using INTERMEDIATE mode - URL match ignoring query strings")
+            safe_print("Rule: documents with the same URL after stripping query string + fragment are grouped")
+            safe_print("Title similarity is NOT considered.")
+            safe_print("")
+            analysis = deduplicator.find_csv_duplicates_intermediate(args.csv_file)
+        else:
+            # Standard analysis
+            analysis = deduplicator.find_csv_duplicates(args.csv_file)
+        
+        if analysis.get("error"):
+            safe_print(f"Error: {analysis['error']}")
+            return
+        
+        # Display results
+        safe_print(f"\n=== CSV Duplicate Analysis Results ===")
+        safe_print(f"CSV file: {analysis['csv_file']}")
+        safe_print(f"Total documents: {analysis['total_documents']}")
+        safe_print(f"Duplicate groups: {analysis['duplicate_groups']}")
+        safe_print(f"Total duplicates: {analysis['total_duplicates']}")
+        
+        if analysis['duplicate_groups'] == 0:
+            safe_print("No duplicate documents found based on source_url")
+            return
+        
+        # Show detailed groups if requested
+        if args.verbose:
+            parts = ["\n=== Duplicate Groups ===\n"]
+            for i, group in enumerate(analysis['groups'], 1):
+                parts.append(f"\nGroup {i}: {group['normalized_url']}\n"
+                             f"  {group['count']} documents with same normalized URL:\n")
+                for doc_info in group['documents']:
+                    data = doc_info['data']
+                    title = data.get('title', 'No title')[:50]
+                    parts.append(f"    Row {doc_info['row_number']}: {title}...\n")
+                if len(parts) >= OUTPUT_BATCH_SIZE:
+                    safe_write(''.join(parts))
+                    parts.clear()
+            safe_write(''.join(parts))
+        
+        # Export duplicate list to CSV
+        if args.export:
+            output_file = args.export
+        else:
+            output_file = None
+        
+        csv_file = deduplicator.export_csv_duplicates(analysis, output_file)
+        if csv_file:
+            safe_print(f"\nDuplicate list saved to: {csv_file}")
+
+    @bulk_output
     def plan_deletion(self, args) -> None:
         """Create deletion plan from duplicate analysis CSV file"""
-        from document_deduplicator import DocumentDeduplicator
+        safe_print("Initializing deletion plan analyzer...")
+        deduplicator = self.deduplicator
         
-        try:
-            safe_print("Initializing deletion plan analyzer...")
-            deduplicator = DocumentDeduplicator(self.client)
-            
-            # Analyze deletion plan
-            prefer_newer = getattr(args, 'prefer_newer', False)
-            analysis = deduplicator.analyze_deletion_plan(args.csv_file, prefer_newer=prefer_newer)
-            
-            if analysis.get("error"):
-                safe_print(f"Error: {analysis['error']}")
-                return
-            
-            # Display results
-            safe_print(f"\n=== Deletion Plan Analysis ===")
-            safe_print(f"CSV file: {analysis['csv_file']}")
-            safe_print(f"Total documents: {analysis['total_documents']}")
-            safe_print(f"Duplicate groups: {analysis['duplicate_groups']}")
-            safe_print(f"Total documents to delete: {analysis['total_to_delete']}")
-            
-            if analysis['duplicate_groups'] == 0:
-                safe_print("No duplicate groups found in CSV file")
-                return
-            
-            # Show detailed analysis if requested
-            if args.verbose:
-                safe_print(f"\n=== Deletion Plan Details ===")
-                for group in analysis['groups']:
-                    safe_print(f"\nGroup {group['group_id']}: {group['normalized_url']}")
-                    safe_print(f"  Total documents: {group['total_documents']}")
-                    safe_print(f"  To delete: {group['deletion_count']}")
-                    
-                    # Show what to keep
-                    keep_doc = group['keep_document']
-                    keep_title = keep_doc.get('title', 'No title')[:50]
-                    safe_print(f"  KEEP: {keep_title}...")
-                    safe_print(f"    ID: {keep_doc.get('id', 'N/A')}")
-                    safe_print(f"    Notes: {'Yes' if keep_doc.get('notes', '').strip() else 'No'}")
-                    safe_print(f"    Tags: {'Yes' if keep_doc.get('tags', '').strip() else 'No'}")
-                    safe_print(f"    Created: {keep_doc.get('created_at', 'N/A')}")
-                    
-                    # Show what to delete
-                    for delete_doc in group['delete_documents']:
-                        delete_title = delete_doc.get('title', 'No title')[:50]
-                        safe_print(f"  DELETE: {delete_title}...")
-                        safe_print(f"    ID: {delete_doc.get('id', 'N/A')}")
-                        safe_print(f"    Notes: {'Yes' if delete_doc.get('notes', '').strip() else 'No'}")
-                        safe_print(f"    Tags: {'Yes' if delete_doc.get('tags', '').strip() else 'No'}")
-                        safe_print(f"    Created: {delete_doc.get('created_at', 'N/A')}")
-            
-            # Export deletion plan to CSV
-            if args.export:
-                output_file = args.export
-            else:
-                output_file = None
-            
-            csv_file = deduplicator.export_deletion_plan(analysis, output_file)
-            if csv_file:
-                safe_print(f"\n✅ Deletion plan saved to: {csv_file}")
-                safe_print(f"💡 Review the plan before executing any deletions")
-                safe_print(f"📋 Plan contains:")
-                safe_print(f"   - KEEP actions: {analysis['duplicate_groups']} documents to preserve")
-                safe_print(f"   - DELETE actions: {analysis['total_to_delete']} documents to remove")
-            
-        except Exception as e:
-            safe_print(f"Error during deletion plan analysis: {e}")
-            import traceback
-            traceback.print_exc()
+        # Analyze deletion plan
+        prefer_newer = getattr(args, 'prefer_newer', False)
+        analysis = deduplicator.analyze_deletion_plan(args.csv_file, prefer_newer=prefer_newer)
+        
+        if analysis.get("error"):
+            safe_print(f"Error: {analysis['error']}")
+            return
+        
+        # Display results
+        safe_print(f"\n=== Deletion Plan Analysis ===")
+        safe_print(f"CSV file: {analysis['csv_file']}")
+        safe_print(f"Total documents: {analysis['total_documents']}")
+        safe_print(f"Duplicate groups: {analysis['duplicate_groups']}")
+        safe_print(f"Total documents to delete: {analysis['total_to_delete']}")
+        
+        if analysis['duplicate_groups'] == 0:
+            safe_print("No duplicate groups found in CSV file")
+            return
+        
+        # Show detailed analysis if requested
+        if args.verbose:
+            parts = ["\n=== Deletion Plan Details ===\n"]
+            for group in analysis['groups']:
+                parts.append(f"\nGroup {group['group_id']}: {group['normalized_url']}\n"
+                             f"  Total documents: {group['total_documents']}\n"
+                             f"  To delete: {group['deletion_count']}\n")
+                
+                # Show what to keep, then what to delete
+                keep_doc = group['keep_document']
+                parts.append(_plan_entry('KEEP', keep_doc))
+                for delete_doc in group['delete_documents']:
+                    parts.append(_plan_entry('DELETE', delete_doc))
+                if len(parts) >= OUTPUT_BATCH_SIZE:
+                    safe_write(''.join(parts))
+                    parts.clear()
+            safe_write(''.join(parts))
+        
+        # Export deletion plan to CSV
+        if args.export:
+            output_file = args.export
+        else:
+            output_file = None
+        
+        csv_file = deduplicator.export_deletion_plan(analysis, output_file)
+        if csv_file:
+            safe_print(f"\n✅ Deletion plan saved to: {csv_file}")
+            safe_print(f"💡 Review the plan before executing any deletions")
+            safe_print(f"📋 Plan contains:")
+            safe_print(f"   - KEEP actions: {analysis['duplicate_groups']} documents to preserve")
+            safe_print(f"   - DELETE actions: {analysis['total_to_delete']} documents to remove")
 
     def execute_deletion(self, args) -> None:
         """Execute deletion plan from CSV file"""
-        from document_deduplicator import DocumentDeduplicator
-        import os
+        from document_deduplicator import load_deletion_plan
         
+        safe_print("Initializing deletion executor...")
+        deduplicator = self.deduplicator
+        
+        # Parse the plan up front: a missing or unreadable file is reported before
+        # any confirmation, and execute_deletion_plan reuses the parsed rows
         try:
-            safe_print("Initializing deletion executor...")
-            deduplicator = DocumentDeduplicator(self.client)
+            load_deletion_plan(args.csv_file)
+        except FileNotFoundError:
+            safe_print(f"Error: File not found: {args.csv_file}")
+            return
+        except Exception as e:
+            safe_print(f"Error: Failed to read CSV file: {e}")
+            return
+        
+        # Determine if this is a dry run or actual execution
+        dry_run = not args.execute
+        
+        # Safety checks for actual execution
+        if args.execute and not args.force:
+            if not sys.stdin.isatty():
+                raise ValueError("refusing to execute a deletion plan non-interactively without --force")
+            safe_print("\n⚠️  WARNING: You are about to execute ACTUAL DELETIONS!")
+            safe_print("This will permanently delete documents from your Readwise Reader.")
+            safe_print("This action CANNOT be undone.")
+            safe_print("\nPlease review your deletion plan carefully before proceeding.")
             
-            # Check if file exists
-            if not os.path.exists(args.csv_file):
-                safe_print(f"Error: File not found: {args.csv_file}")
+            confirmation = prompt_line("\nType 'DELETE' to confirm execution: ").strip()
+            if confirmation != 'DELETE':
+                safe_print("Operation cancelled.")
                 return
+        
+        # Execute deletion plan
+        result = deduplicator.execute_deletion_plan(
+            args.csv_file, 
+            dry_run=dry_run, 
+            batch_size=args.batch_size,
+            max_retries=args.max_retries
+        )
+        
+        if result.get("error"):
+            safe_print(f"Error: {result['error']}")
+            return
+        
+        # Show results
+        if dry_run:
+            safe_print(f"\n=== DRY RUN COMPLETED ===")
+            safe_print(f"Found {result.get('total_candidates', 0)} documents marked for deletion")
+            safe_print(f"Previewed {result.get('preview_shown', 0)} documents")
+            safe_print("\nTo execute actual deletions, use: --execute")
+            safe_print("WARNING: Add --force to skip confirmation prompts")
+        else:
+            safe_print(f"\n=== EXECUTION COMPLETED ===")
+            safe_print(f"Total processed: {result.get('processed', 0)}")
+            safe_print(f"Successful deletions: {result.get('successful_deletions', 0)}")
+            safe_print(f"Failed deletions: {result.get('failed_deletions', 0)}")
             
-            # Determine if this is a dry run or actual execution
-            dry_run = not args.execute
-            
-            # Safety checks for actual execution
-            if args.execute and not args.force:
-                safe_print("\n⚠️  WARNING: You are about to execute ACTUAL DELETIONS!")
-                safe_print("This will permanently delete documents from your Readwise Reader.")
-                safe_print("This action CANNOT be undone.")
-                safe_print("\nPlease review your deletion plan carefully before proceeding.")
-                
-                confirmation = input("\nType 'DELETE' to confirm execution: ")
-                if confirmation != 'DELETE':
-                    safe_print("Operation cancelled.")
-                    return
-            
-            # Execute deletion plan
-            result = deduplicator.execute_deletion_plan(
-                args.csv_file, 
-                dry_run=dry_run, 
-                batch_size=args.batch_size
-            )
+            if result.get('success_rate'):
+                safe_print(f"Success rate: {result.get('success_rate', 0)*100:.1f}%")
             
-            if result.get("error"):
-                safe_print(f"Error: {result['error']}")
-                return
+            if result.get('report_file'):
+                safe_print(f"Execution report saved: {result['report_file']}")
             
-            # Show results
-            if dry_run:
-                safe_print(f"\n=== DRY RUN COMPLETED ===")
-                safe_print(f"Found {result.get('total_candidates', 0)} documents marked for deletion")
-                safe_print(f"Previewed {result.get('preview_shown', 0)} documents")
-                safe_print("\nTo execute actual deletions, use: --execute")
-                safe_print("WARNING: Add --force to skip confirmation prompts")
-            else:
-                safe_print(f"\n=== EXECUTION COMPLETED ===")
-                safe_print(f"Total processed: {result.get('processed', 0)}")
-                safe_print(f"Successful deletions: {result.get('successful_deletions', 0)}")
-                safe_print(f"Failed deletions: {result.get('failed_deletions', 0)}")
-                
-                if result.get('success_rate'):
-                    safe_print(f"Success rate: {result.get('success_rate', 0)*100:.1f}%")
-                
-                if result.get('report_file'):
-                    safe_print(f"Execution report saved: {result['report_file']}")
-                
-                if result.get('errors'):
-                    safe_print(f"\nWarning: {len(result['errors'])} errors occurred during execution")
-        
-        except Exception as e:
-            safe_print(f"Error during deletion execution: {e}")
-            import traceback
-            traceback.print_exc()
+            if result.get('errors'):
+                safe_print(f"\nWarning: {len(result['errors'])} errors occurred during execution")
 
     def setup_token(self, args) -> None:
         """Setup API token"""
@@ -536,97 +656,172 @@ class ReadwiseCLI:
             print("Please provide API token")
             print("Usage: python cli.py setup-token --token YOUR_TOKEN")
             print("Get token: https://readwise.io/access_token")
-
-def build_parser() -> argparse.ArgumentParser:
-    """Build the top-level argparse parser. Extracted from main() so tests can
-    drive parsing without invoking the full CLI flow."""
-    parser = argparse.ArgumentParser(description="Readwise Reader Management Tool")
-    subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
-    # Add article
+    def repl(self, args) -> None:
+        """Run commands read from stdin, one per line, in this process so the API
+        session and its keep-alive connection are reused between commands"""
+        import shlex
+        
+        interactive = sys.stdin.isatty()
+        while True:
+            if interactive:
+                safe_write('readwise> ')
+            line = sys.stdin.readline()
+            if not line:
+                break
+            
+            try:
+                argv = shlex.split(line, comments=True)
+            except ValueError as e:
+                print(f"Error: {e}")
+                continue
+            if not argv:
+                continue
+            if argv[0] in ('exit', 'quit'):
+                break
+            if argv[0] in ('repl', 'setup-token'):
+                print(f"'{argv[0]}' is not available in repl mode")
+                continue
+            
+            try:
+                command_args = build_parser(argv[0]).parse_args(argv)
+            except SystemExit:
+                # argparse has already printed the usage error or help
+                continue
+            
+            if command_args.command == 'verify':
+                print("API connection OK" if self.verify_connection() else "API connection failed")
+            else:
+                run_command(self, command_args)
+
+
+def _build_add_parser(subparsers) -> None:
     add_parser = subparsers.add_parser('add', help='Add article')
+    add_parser.set_defaults(handler='add_article', failure='Failed to add article')
     add_parser.add_argument('url', help='Article URL')
     add_parser.add_argument('--title', help='Article title')
-    add_parser.add_argument('--tags', help='Tags, comma separated')
+    add_parser.add_argument('--tags', type=parse_tags, help='Tags, comma separated')
     add_parser.add_argument('--location', default='new', 
-                           choices=['new', 'later', 'archive', 'feed'],
+                           type=str.lower, choices=LOCATIONS,
                            help='Document location')
-    
-    # List documents
+
+
+def _build_list_parser(subparsers) -> None:
     list_parser = subparsers.add_parser('list', help='List documents')
-    list_parser.add_argument('--location', choices=['new', 'later', 'archive', 'feed'],
+    list_parser.set_defaults(handler='list_documents', failure='Failed to list documents')
+    list_parser.add_argument('--location', type=str.lower, choices=LOCATIONS,
                             help='Filter by location')
     list_parser.add_argument('--category', help='Filter by category')
     list_parser.add_argument('--limit', type=int, help='Limit count')
-    list_parser.add_argument('--format', choices=['text', 'json', 'csv'], default='text',
-                            help='Output format')
+    list_parser.add_argument('--format', choices=FORMATS + ('ndjson', 'csv'), default='text',
+                            help='Output format (ndjson: one JSON document per line)')
     list_parser.add_argument('--verbose', '-v', action='store_true', 
                             help='Show detailed information')
     list_parser.add_argument('--no-progress', action='store_true',
                             help='Disable progress display for large document lists')
-    
-    # Search documents
+
+
+def _build_search_parser(subparsers) -> None:
     search_parser = subparsers.add_parser('search', help='Search documents')
+    search_parser.set_defaults(handler='search_documents', failure='Failed to search documents')
     search_parser.add_argument('keyword', help='Search keyword')
-    search_parser.add_argument('--location', choices=['new', 'later', 'archive', 'feed'],
+    search_parser.add_argument('--location', type=str.lower, choices=LOCATIONS,
                               help='Search scope')
-    
-    # Update document
+    search_parser.add_argument('--format', choices=FORMATS + ('ndjson',), default='text',
+                              help='Output format')
+
+
+def _build_update_parser(subparsers) -> None:
     update_parser = subparsers.add_parser('update', help='Update document')
-    update_parser.add_argument('id', help='Document ID')
+    update_parser.set_defaults(handler='update_document', failure='Failed to update document')
+    update_parser.add_argument('id', nargs='+',
+                              help='Document ID(s); several IDs can be moved concurrently with --location')
     update_parser.add_argument('--title', help='New title')
     update_parser.add_argument('--author', help='New author')
     update_parser.add_argument('--summary', help='New summary')
-    update_parser.add_argument('--location', choices=['new', 'later', 'archive', 'feed'],
+    update_parser.add_argument('--location', type=str.lower, choices=LOCATIONS,
                               help='Move to location')
-    
-    # Delete document
-    delete_parser = subparsers.add_parser('delete', help='Delete document')
-    delete_parser.add_argument('id', help='Document ID')
+
+
+def _build_delete_parser(subparsers) -> None:
+    delete_parser = subparsers.add_parser('delete', help='Delete documents')
+    delete_parser.set_defaults(handler='delete_document', failure='Failed to delete document')
+    delete_parser.add_argument('id', nargs='+', help='Document ID(s); several IDs are deleted concurrently')
     delete_parser.add_argument('--force', '-f', action='store_true',
                               help='Force delete without confirmation')
-    
-    # Statistics
+
+
+def _build_stats_parser(subparsers) -> None:
     stats_parser = subparsers.add_parser('stats', help='Show statistics')
+    stats_parser.set_defaults(handler='show_stats', failure='Failed to get statistics')
     stats_parser.add_argument('--include-tags', action='store_true',
                              help='Include tag statistics')
-    
-    # Export documents
+
+
+def _build_export_parser(subparsers) -> None:
     export_parser = subparsers.add_parser('export', help='Export documents')
-    export_parser.add_argument('--location', choices=['new', 'later', 'archive', 'feed'],
+    export_parser.set_defaults(handler='export_documents', failure='Export failed')
+    export_parser.add_argument('--location', type=str.lower, choices=LOCATIONS,
                               help='Export location')
     export_parser.add_argument('--output', '-o', help='Output filename')
-    
-    # Tag management
+    export_parser.add_argument('--format', choices=('json', 'ndjson'), default='json',
+                              help='Output format: JSON array or NDJSON, one document per line (default: json)')
+    export_parser.add_argument('--gzip', action='store_true',
+                              help='Compress the output with gzip (implied by an --output ending in .gz)')
+
+
+def _add_tag_cache_arguments(parser) -> None:
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore the cached tag list and fetch it again')
+    parser.add_argument('--ttl', type=float, default=TAG_CACHE_SECONDS, metavar='SECONDS',
+                        help=f'Reuse a cached tag list younger than this (default: {TAG_CACHE_SECONDS})')
+
+
+def _build_tags_parser(subparsers) -> None:
     tags_parser = subparsers.add_parser('tags', help='List tags')
+    tags_parser.set_defaults(handler='list_tags', failure='Failed to list tags')
     tags_parser.add_argument('--search', help='Search tags')
     tags_parser.add_argument('--sort', choices=['name', 'key'], default='name',
                             help='Sort method')
-    tags_parser.add_argument('--format', choices=['text', 'json'], default='text',
+    tags_parser.add_argument('--format', choices=FORMATS + ('ndjson',), default='text',
                             help='Output format')
     tags_parser.add_argument('--verbose', '-v', action='store_true',
                             help='Show detailed information')
-    
-    # Tag statistics
+    _add_tag_cache_arguments(tags_parser)
+
+
+def _build_tag_stats_parser(subparsers) -> None:
     tag_stats_parser = subparsers.add_parser('tag-stats', help='Tag statistics')
-    
-    # Deduplication analysis
+    tag_stats_parser.set_defaults(handler='tag_stats', failure='Failed to get tag statistics')
+    _add_tag_cache_arguments(tag_stats_parser)
+
+
+def _build_analyze_duplicates_parser(subparsers) -> None:
     dedup_analyze_parser = subparsers.add_parser('analyze-duplicates', 
                                                 help='Analyze duplicate documents (no deletion)')
+    dedup_analyze_parser.set_defaults(handler='analyze_duplicates', failure='Analysis failed')
     dedup_analyze_parser.add_argument('--location', 
-                                     choices=['new', 'later', 'archive', 'feed'],
+                                     type=str.lower, choices=LOCATIONS,
                                      help='Limit analysis to specific location')
     dedup_analyze_parser.add_argument('--limit', type=int,
                                      help='Limit number of documents to analyze')
-    dedup_analyze_parser.add_argument('--format', choices=['text', 'json'], 
+    dedup_analyze_parser.add_argument('--format', choices=FORMATS, 
                                      default='text', help='Output format')
     dedup_analyze_parser.add_argument('--export', help='Export analysis report to specified file')
-    
-    # Deduplication execution
+    dedup_analyze_parser.add_argument('--jobs', '-j', type=positive_int, default=1, metavar='N',
+                                     help='Fetch the four locations in parallel with up to N (at most 4) workers when no --location/--limit is given (default: 1)')
+    dedup_analyze_parser.add_argument('--near-duplicates', action='store_true',
+                                     help='Match documents with different URLs by MinHash similarity of title, author and summary')
+    dedup_analyze_parser.add_argument('--near-threshold', type=similarity_threshold, default=0.85, metavar='JACCARD',
+                                     help='Minimum estimated similarity for --near-duplicates (default: 0.85)')
+
+
+def _build_remove_duplicates_parser(subparsers) -> None:
     dedup_remove_parser = subparsers.add_parser('remove-duplicates', 
                                                help='Execute deduplication operation')
+    dedup_remove_parser.set_defaults(handler='remove_duplicates', failure='Deduplication failed')
     dedup_remove_parser.add_argument('--location', 
-                                    choices=['new', 'later', 'archive', 'feed'],
+                                    type=str.lower, choices=LOCATIONS,
                                     help='Limit processing to specific location')
     dedup_remove_parser.add_argument('--limit', type=int,
                                     help='Limit number of documents to process')
@@ -638,14 +833,24 @@ def build_parser() -> argparse.ArgumentParser:
     dedup_remove_parser.add_argument('--force', action='store_true',
                                     help='Auto-confirm without asking user')
     dedup_remove_parser.add_argument('--export', help='Export processing report to specified file')
-    
-    # CSV duplicate analysis
+    dedup_remove_parser.add_argument('--delete-concurrency', type=positive_int, default=1, metavar='N',
+                                    help='Deletion requests in flight at once; the API rate limit '
+                                         'is kept regardless (default: 1)')
+    dedup_remove_parser.add_argument('--jobs', '-j', type=positive_int, default=1, metavar='N',
+                                    help='Fetch the four locations in parallel with up to N (at most 4) workers when no --location/--limit is given (default: 1)')
+
+
+def _build_analyze_csv_duplicates_parser(subparsers) -> None:
     csv_dedup_parser = subparsers.add_parser('analyze-csv-duplicates', 
                                             help='Analyze duplicates in CSV file based on source_url')
+    csv_dedup_parser.set_defaults(handler='analyze_csv_duplicates',
+                                  failure='Error during CSV duplicate analysis',
+                                  show_traceback=True)
     csv_dedup_parser.add_argument('csv_file', help='Path to CSV file to analyze')
     csv_dedup_parser.add_argument('--verbose', action='store_true',
                                  help='Show detailed duplicate groups')
     csv_dedup_parser.add_argument('--export', help='Export duplicate list to specified CSV file')
+    from document_deduplicator import ADVANCED_RULE_SENTENCE
     # argparse treats bare % as a format specifier; escape every % in help text.
     advanced_help = ADVANCED_RULE_SENTENCE.replace('%', '%%')
     csv_dedup_parser.add_argument('--mode',
@@ -659,48 +864,188 @@ def build_parser() -> argparse.ArgumentParser:
                                  ))
     csv_dedup_parser.add_argument('--advanced', action='store_true',
                                  help=f'Backward-compatible alias for --mode advanced. ⚠️ Rule: {advanced_help}.')
-    
-    # Deletion plan analysis
+
+
+def _build_plan_deletion_parser(subparsers) -> None:
     plan_deletion_parser = subparsers.add_parser('plan-deletion', 
                                                 help='Create deletion plan from duplicate analysis CSV')
+    plan_deletion_parser.set_defaults(handler='plan_deletion',
+                                      failure='Error during deletion plan analysis',
+                                      show_traceback=True)
     plan_deletion_parser.add_argument('csv_file', help='Path to duplicates CSV file (e.g., readwise_duplicates_*.csv)')
     plan_deletion_parser.add_argument('--export', help='Export deletion plan to specified CSV file')
     plan_deletion_parser.add_argument('--verbose', action='store_true',
                                      help='Show detailed analysis of each group')
     plan_deletion_parser.add_argument('--prefer-newer', action='store_true',
                                      help='Prefer newer documents over older ones (default: prefer older)')
-    
-    # Execute deletion plan
+
+
+def _build_execute_deletion_parser(subparsers) -> None:
     execute_deletion_parser = subparsers.add_parser('execute-deletion', 
                                                    help='Execute deletion plan from CSV file')
+    execute_deletion_parser.set_defaults(handler='execute_deletion',
+                                         failure='Error during deletion execution',
+                                         show_traceback=True)
     execute_deletion_parser.add_argument('csv_file', help='Path to deletion plan CSV file (e.g., readwise_deletion_plan_*.csv)')
     execute_deletion_parser.add_argument('--dry-run', action='store_true', default=True,
                                         help='Preview deletions without executing (default)')
     execute_deletion_parser.add_argument('--execute', action='store_true',
                                         help='Actually execute deletions (WARNING: irreversible)')
     execute_deletion_parser.add_argument('--batch-size', type=int, default=5,
-                                        help='Number of documents to process per batch (default: 5, respects 20 req/min API limit)')
+                                        help='Number of documents deleted concurrently per batch (default: 5); requests stay within the 20 req/min API limit')
+    execute_deletion_parser.add_argument('--max-retries', type=positive_int, metavar='N',
+                                        help='Retries per document after HTTP 429, each after the '
+                                             "server's Retry-After wait (default: 20)")
     execute_deletion_parser.add_argument('--force', action='store_true',
                                         help='Skip safety confirmation prompts')
-    
-    # Setup token
+
+
+def _build_setup_token_parser(subparsers) -> None:
     setup_parser = subparsers.add_parser('setup-token', help='Setup API token')
     setup_parser.add_argument('--token', help='Readwise API token')
+
+
+def _build_verify_parser(subparsers) -> None:
+    subparsers.add_parser('verify', help='Verify API connection')
+
+
+def _build_repl_parser(subparsers) -> None:
+    repl_parser = subparsers.add_parser(
+        'repl', help='Run commands from stdin, one per line, reusing one API connection'
+    )
+    repl_parser.set_defaults(handler='repl', failure='Command failed')
+
+
+# Subcommand name -> builder. Insertion order is the order shown in --help.
+SUBPARSER_BUILDERS = {
+    'add': _build_add_parser,
+    'list': _build_list_parser,
+    'search': _build_search_parser,
+    'update': _build_update_parser,
+    'delete': _build_delete_parser,
+    'stats': _build_stats_parser,
+    'export': _build_export_parser,
+    'tags': _build_tags_parser,
+    'tag-stats': _build_tag_stats_parser,
+    'analyze-duplicates': _build_analyze_duplicates_parser,
+    'remove-duplicates': _build_remove_duplicates_parser,
+    'analyze-csv-duplicates': _build_analyze_csv_duplicates_parser,
+    'plan-deletion': _build_plan_deletion_parser,
+    'execute-deletion': _build_execute_deletion_parser,
+    'setup-token': _build_setup_token_parser,
+    'verify': _build_verify_parser,
+    'repl': _build_repl_parser,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def build_parser(command: Optional[str] = None) -> 'argparse.ArgumentParser':
+    """Build the top-level argparse parser. Extracted from main() so tests can
+    drive parsing without invoking the full CLI flow.
+
+    When ``command`` names a known subcommand only that subparser is built,
+    which keeps startup cheap for the common single-command invocation.
+    Otherwise (no command, ``-h``, typos) every subparser is built so help
+    output and "invalid choice" errors still list all commands.
+
+    Parsers are memoized per ``command``; parse_args() does not mutate the
+    parser, so repeated parses in one process reuse the built spec.
+    """
+    import argparse
     
-    # Verify connection
-    verify_parser = subparsers.add_parser('verify', help='Verify API connection')
+    parser = argparse.ArgumentParser(description="Readwise Reader Management Tool")
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+    
+    if command in SUBPARSER_BUILDERS:
+        SUBPARSER_BUILDERS[command](subparsers)
+    else:
+        for builder in SUBPARSER_BUILDERS.values():
+            builder(subparsers)
 
     return parser
 
 
+# Output of build_parser().format_help() for `python cli.py` at 80 columns,
+# printed as-is when no arguments are given so argparse is never imported.
+# tests/test_cli.py checks it against the real parser; regenerate it when
+# commands are added or renamed.
+NO_COMMAND_HELP = """\
+usage: cli.py [-h]
+              {add,list,search,update,delete,stats,export,tags,tag-stats,analyze-duplicates,remove-duplicates,analyze-csv-duplicates,plan-deletion,execute-deletion,setup-token,verify,repl}
+              ...
+
+Readwise Reader Management Tool
+
+positional arguments:
+  {add,list,search,update,delete,stats,export,tags,tag-stats,analyze-duplicates,remove-duplicates,analyze-csv-duplicates,plan-deletion,execute-deletion,setup-token,verify,repl}
+                        Available commands
+    add                 Add article
+    list                List documents
+    search              Search documents
+    update              Update document
+    delete              Delete documents
+    stats               Show statistics
+    export              Export documents
+    tags                List tags
+    tag-stats           Tag statistics
+    analyze-duplicates  Analyze duplicate documents (no deletion)
+    remove-duplicates   Execute deduplication operation
+    analyze-csv-duplicates
+                        Analyze duplicates in CSV file based on source_url
+    plan-deletion       Create deletion plan from duplicate analysis CSV
+    execute-deletion    Execute deletion plan from CSV file
+    setup-token         Setup API token
+    verify              Verify API connection
+    repl                Run commands from stdin, one per line, reusing one API
+                        connection
+
+options:
+  -h, --help            show this help message and exit
+"""
+
+
+def run_command(cli: ReadwiseCLI, args) -> bool:
+    """Run the ReadwiseCLI method named by args.handler. Command methods let
+    errors propagate; they are reported here once, to stderr, prefixed with the
+    subparser's set_defaults(failure=...) message. Returns False on failure."""
+    try:
+        getattr(cli, args.handler)(args)
+    except Exception as e:
+        print(f"{args.failure}: {e}", file=sys.stderr)
+        if getattr(args, 'show_traceback', False):
+            import traceback
+            traceback.print_exc()
+        return False
+    return True
+
+
+def _fast_path_args(argv: List[str]) -> Optional[SimpleNamespace]:
+    """Recognize `verify` and `setup-token --token TOKEN` exactly as argparse would
+    parse them, so main() can run them without building a parser. Anything else,
+    including tokens that look like options, returns None and goes through argparse."""
+    if argv == ['verify']:
+        return SimpleNamespace(command='verify')
+    if len(argv) == 3 and argv[:2] == ['setup-token', '--token'] and not argv[2].startswith('-'):
+        return SimpleNamespace(command='setup-token', token=argv[2])
+    if len(argv) == 2 and argv[0] == 'setup-token' and argv[1].startswith('--token='):
+        return SimpleNamespace(command='setup-token', token=argv[1][len('--token='):])
+    return None
+
+
 def main():
-    parser = build_parser()
-    args = parser.parse_args()
-    
-    if not args.command:
-        parser.print_help()
+    if len(sys.argv) == 1 and os.path.basename(sys.argv[0]) == 'cli.py':
+        sys.stdout.write(NO_COMMAND_HELP)
         return
     
+    args = _fast_path_args(sys.argv[1:])
+    if args is None:
+        parser = build_parser(sys.argv[1] if len(sys.argv) > 1 else None)
+        args = parser.parse_args()
+        
+        if not args.command:
+            parser.print_help()
+            return
+    
     cli = ReadwiseCLI()
     
     # Special commands don't need connection verification
@@ -713,37 +1058,18 @@ def main():
             print("API connection OK")
         else:
             print("API connection failed")
+            sys.exit(1)
         return
     
-    # Other commands need connection verification
-    if not cli.verify_connection():
+    # Other commands need connection verification; a recent success is reused
+    # since the command's own API calls will surface a revoked token anyway
+    if not cli.verify_connection(max_age=VERIFY_CACHE_SECONDS):
         print("Please set up a valid API token first")
         print("Use command: python cli.py setup-token --token YOUR_TOKEN")
         sys.exit(1)
     
-    # Execute corresponding command
-    command_map = {
-        'add': cli.add_article,
-        'list': cli.list_documents,
-        'search': cli.search_documents,
-        'update': cli.update_document,
-        'delete': cli.delete_document,
-        'stats': cli.show_stats,
-        'export': cli.export_documents,
-        'tags': cli.list_tags,
-        'tag-stats': cli.tag_stats,
-        'analyze-duplicates': cli.analyze_duplicates,
-        'remove-duplicates': cli.remove_duplicates,
-        'analyze-csv-duplicates': cli.analyze_csv_duplicates,
-        'plan-deletion': cli.plan_deletion,
-        'execute-deletion': cli.execute_deletion,
-    }
-    
-    if args.command in command_map:
-        command_map[args.command](args)
-    else:
-        print(f"Unknown command: {args.command}")
-        parser.print_help()
+    if not run_command(cli, args):
+        sys.exit(1)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -8,6 +8,10 @@ class Config:
         self.api_token = self._get_api_token()
         self.base_url = "https://readwise.io/api/v3"
         self.auth_url = "https://readwise.io/api/v2/auth/"
+        self.cache_dir = os.path.join(
+            os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+            'readwise-reader'
+        )
         
     def _get_api_token(self) -> str:
         """Get API token from environment variable or file"""
@@ -1,12 +1,27 @@
-from typing import List, Dict, Optional, Any, Tuple, Set
+from typing import List, Dict, Iterable, Optional, Any, Tuple, Set, TYPE_CHECKING
 from datetime import datetime
 import re
 from urllib.parse import urlparse, parse_qs, urljoin
 import difflib
-from collections import defaultdict
+import random
+import zlib
+import functools
+import itertools
+import os
+from collections import defaultdict, Counter
 import json
-from readwise_client import ReadwiseClient
-from document_manager import safe_print
+from document_manager import safe_print, prompt_line, write_json, CSV_WRITE_BUFFER
+
+try:
+    # Optional: its C longest-common-subsequence length gives a much tighter
+    # upper bound on SequenceMatcher.ratio() than character counts
+    from rapidfuzz.distance import LCSseq
+    from rapidfuzz import process as fuzz_process
+except ImportError:
+    LCSseq = fuzz_process = None
+
+if TYPE_CHECKING:
+    from readwise_client import ReadwiseClient
 
 # Canonical phrasing for advanced-mode rule. Reused by user-facing strings
 # (CLI banner, --mode help, exported analysis warning) and pinned by tests so
@@ -15,69 +30,193 @@ ADVANCED_RULE_SENTENCE = (
     "Title similarity > 50% OR same URL after stripping query string + fragment"
 )
 
+# The document fields duplicate grouping, quality scoring and the analysis report
+# read; everything else in an API document is dropped before analysis.
+DEDUP_FIELDS = ('id', 'title', 'source_url', 'url', 'author', 'summary',
+                'published_date', 'created_at', 'tags', 'updated_at', 'location')
+
+# Columns export_csv_duplicates copies from each plan row, after its group columns
+# (group_id, normalized_url, the advanced-mode details, then row_number)
+CSV_EXPORT_DATA_FIELDS = ('id', 'title', 'source_url', 'author', 'source', 'notes',
+                          'tags', 'created_at', 'location')
+
+
+def slim_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of doc with only its DEDUP_FIELDS"""
+    return {field: doc[field] for field in DEDUP_FIELDS if field in doc}
+
+
+# Substrings marking a shortened link, which scores lower than the original URL
+_SHORTENER_PATTERN = re.compile(r'bit\.ly|t\.co|tinyurl|short')
+
+_TITLE_PUNCTUATION = re.compile(r'[^\w\s\u4e00-\u9fff]')
+# str.translate table removing the ASCII characters _TITLE_PUNCTUATION matches,
+# so ASCII titles skip the regex engine
+_ASCII_PUNCTUATION = {code: None for code in range(128)
+                      if not (chr(code).isalnum() or chr(code).isspace() or chr(code) == '_')}
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase a title, drop punctuation and collapse whitespace for comparison"""
+    normalized = title.lower()
+    if normalized.isascii():
+        normalized = normalized.translate(_ASCII_PUNCTUATION)
+    else:
+        normalized = _TITLE_PUNCTUATION.sub('', normalized)
+    return ' '.join(normalized.split())
+
+
+def _shared_characters(title1: str, counts1: Optional[Counter],
+                       title2: str, counts2: Optional[Counter]) -> int:
+    """Upper bound on the characters SequenceMatcher can match between two titles.
+    
+    The matching blocks form a common subsequence, so the longest common
+    subsequence bounds them; without rapidfuzz, the per-character counts
+    quick_ratio() uses do (counts are only built in that case).
+    """
+    if LCSseq is not None:
+        return LCSseq.similarity(title1, title2)
+    return sum((counts1 & counts2).values())
+
+
+def _title_candidates(title: str, pending: List[Optional[str]], threshold: float) -> List[int]:
+    """Indices, in order, of the pending titles that may reach threshold
+    similarity with title.
+    
+    Requires rapidfuzz: the whole row is scanned in C instead of one Python
+    call per pair. A match needs len2 >= len1 * t / (2 - t) (the length
+    bound), and therefore an LCS with title of at least that many characters;
+    that integer LCS cutoff is exact, unlike float score cutoffs. None
+    entries (titles already grouped or compared) are skipped. Callers still
+    apply the per-pair bounds and ratio() to the candidates.
+    """
+    min_common = int(len(title) * threshold / (2 - threshold) - 1e-9)
+    matches = fuzz_process.extract(title, pending, scorer=LCSseq.similarity, processor=None,
+                                   score_cutoff=min_common, limit=None)
+    return sorted(index for _, _, index in matches)
+
+
+# Query parameters that only track where a link was shared
+_TRACKING_PARAMS = frozenset({
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+    'utm_id', 'utm_name', 'utm_reader', 'utm_brand', 'utm_social', 'utm_social-type',
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid',
+    'twclid', 'ttclid', 'li_fat_id', 'igshid', 'igsh', 'si',
+    'ref', 'ref_src', 'ref_url', 'source', 'campaign',
+    'medium', 'term', 'content', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    '_hsenc', '_hsmi', '__hssc', '__hstc', '__hsfp', 'hsctatracking',
+    'mkt_tok', 'vero_id', 'vero_conv', 'oly_anon_id', 'oly_enc_id',
+    'rb_clickid', 's_cid', 'spm', 'scm', 'ck_subscriber_id', '_bhlid',
+    'sc_cid', 'cmpid', 'ocid', 'sr_share', 'smid',
+})
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize_url(url: str) -> str:
+    """Normalize URL by removing tracking parameters and fragments. Cached, since
+    duplicates share URLs and the same URL is normalized by several passes"""
+    if not url:
+        return ""
+        
+    try:
+        parsed = urlparse(url.lower().strip())
+        
+        if parsed.query:
+            query_params = parse_qs(parsed.query)
+            cleaned_params = {k: v for k, v in query_params.items() 
+                            if k.lower() not in _TRACKING_PARAMS}
+            
+            # Rebuild query string
+            query_parts = [f"{k}={v}" for k, v_list in cleaned_params.items() for v in v_list]
+            new_query = "&".join(sorted(query_parts))
+        else:
+            new_query = ""
+        
+        # Rebuild URL (remove fragments)
+        normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+        if new_query:
+            normalized += f"?{new_query}"
+            
+        return normalized
+        
+    except Exception:
+        return url.lower().strip()
+
+
+# Near-duplicate detection (analyze-duplicates --near-duplicates): MinHash
+# signatures over character shingles of title + author + summary, bucketed by
+# banded LSH so only documents sharing a band are compared.
+NEAR_DUPLICATE_THRESHOLD = 0.85
+MINHASH_PERMUTATIONS = 128
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed: signatures (and so the groups found) are reproducible across runs
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(_MERSENNE_PRIME))
+                 for _ in range(MINHASH_PERMUTATIONS)]
+del _rng
+
+
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    """MinHash signature of the character shingles of text (empty for empty text)"""
+    shingles = {text[i:i + SHINGLE_SIZE]
+                for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles if shingle]
+    if not hashes:
+        return ()
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def lsh_bands(threshold: float, num_perm: int = MINHASH_PERMUTATIONS) -> Tuple[int, int]:
+    """(bands, rows) whose S-curve midpoint (1/bands)**(1/rows) is closest to threshold"""
+    return min(((bands, num_perm // bands) for bands in range(1, num_perm + 1)),
+               key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+# execute-deletion works through whole plans, often against an account that is
+# already being throttled, so each document outlasts many more 429s than the
+# client's default before it is reported as failed
+PLAN_DELETE_MAX_RETRIES = 20
+
+
+@functools.lru_cache(maxsize=4)
+def _read_plan_rows(path: str, mtime_ns: int, size: int) -> Tuple[Dict[str, str], ...]:
+    """Rows of a deletion plan CSV. The modification time and size are part of
+    the cache key, so an edited plan is read again"""
+    import csv
+    with open(path, 'r', encoding='utf-8') as csvfile:
+        return tuple(csv.DictReader(csvfile))
+
+
+def load_deletion_plan(csv_file_path: str) -> Tuple[Dict[str, str], ...]:
+    """Parsed rows of a deletion plan CSV, reused while the file is unchanged
+    (a dry run followed by --execute in one repl session, or the plan update
+    after execution). The rows are shared and must not be modified."""
+    stat = os.stat(csv_file_path)
+    return _read_plan_rows(os.path.abspath(csv_file_path), stat.st_mtime_ns, stat.st_size)
+
 
 class DocumentDeduplicator:
     """Smart document deduplicator - removes duplicates based on content similarity and metadata quality"""
     
-    def __init__(self, client: Optional[ReadwiseClient] = None):
-        self.client = client or ReadwiseClient()
+    def __init__(self, client: Optional['ReadwiseClient'] = None):
+        if client is None:
+            from readwise_client import ReadwiseClient
+            client = ReadwiseClient()
+        self.client = client
         self.similarity_threshold = 0.8  # Title similarity threshold
         self.url_similarity_threshold = 0.9  # URL similarity threshold
         
     def normalize_url(self, url: str) -> str:
         """Normalize URL by removing tracking parameters and fragments"""
-        if not url:
-            return ""
-            
-        try:
-            parsed = urlparse(url.lower().strip())
-            
-            # Remove common tracking parameters
-            tracking_params = {
-                'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
-                'fbclid', 'gclid', 'msclkid', 'ref', 'source', 'campaign',
-                'medium', 'term', 'content', 'mc_cid', 'mc_eid', '_ga', '_gl'
-            }
-            
-            if parsed.query:
-                query_params = parse_qs(parsed.query)
-                cleaned_params = {k: v for k, v in query_params.items() 
-                                if k.lower() not in tracking_params}
-                
-                # Rebuild query string
-                if cleaned_params:
-                    query_parts = []
-                    for k, v_list in cleaned_params.items():
-                        for v in v_list:
-                            query_parts.append(f"{k}={v}")
-                    new_query = "&".join(sorted(query_parts))
-                else:
-                    new_query = ""
-            else:
-                new_query = ""
-            
-            # Rebuild URL (remove fragments)
-            normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            if new_query:
-                normalized += f"?{new_query}"
-                
-            return normalized
-            
-        except Exception:
-            return url.lower().strip()
+        return normalize_url(url)
     
     def calculate_title_similarity(self, title1: str, title2: str) -> float:
         """Calculate title similarity between two titles"""
         if not title1 or not title2:
             return 0.0
         
-        # Normalize titles (remove extra whitespace, special characters, etc.)
-        def normalize_title(title: str) -> str:
-            # Remove extra whitespace and punctuation
-            normalized = re.sub(r'[^\w\s\u4e00-\u9fff]', '', title.lower())
-            normalized = re.sub(r'\s+', ' ', normalized).strip()
-            return normalized
-        
         norm_title1 = normalize_title(title1)
         norm_title2 = normalize_title(title2)
         
@@ -88,14 +227,18 @@ class DocumentDeduplicator:
         similarity = difflib.SequenceMatcher(None, norm_title1, norm_title2).ratio()
         return similarity
     
-    def calculate_metadata_quality_score(self, document: Dict[str, Any]) -> float:
-        """Calculate document metadata quality score (0-100)"""
+    def calculate_metadata_quality_score(self, document: Dict[str, Any],
+                                         now: Optional[datetime] = None) -> float:
+        """Calculate document metadata quality score (0-100)
+        
+        now is the reference time for update recency; callers scoring many
+        documents pass one datetime.now() instead of taking it per document.
+        """
         score = 0.0
         max_score = 100.0
         
         # Title quality (25 points)
-        title = document.get('title') or ''
-        title = title.strip() if title else ''
+        title = (document.get('title') or '').strip()
         if title:
             if len(title) > 10:
                 score += 25
@@ -105,14 +248,12 @@ class DocumentDeduplicator:
                 score += 5
         
         # Author information (15 points)
-        author = document.get('author') or ''
-        author = author.strip() if author else ''
+        author = (document.get('author') or '').strip()
         if author and author != 'Unknown':
             score += 15
         
         # Summary/description (20 points)
-        summary = document.get('summary') or ''
-        summary = summary.strip() if summary else ''
+        summary = (document.get('summary') or '').strip()
         if summary:
             if len(summary) > 100:
                 score += 20
@@ -122,24 +263,19 @@ class DocumentDeduplicator:
                 score += 10
         
         # Published date (10 points)
-        published_date = document.get('published_date') or document.get('created_at')
-        if published_date:
+        if document.get('published_date') or document.get('created_at'):
             score += 10
         
         # Number of tags (10 points)
         tags = document.get('tags', [])
         if tags:
-            tag_count = len(tags)
-            if tag_count >= 3:
-                score += 10
-            elif tag_count >= 1:
-                score += 5
+            score += 10 if len(tags) >= 3 else 5
         
         # URL quality (10 points)
         url = document.get('source_url') or document.get('url', '')
         if url:
             # Check if it's a short URL or original URL
-            if any(domain in url for domain in ['bit.ly', 't.co', 'tinyurl', 'short']):
+            if _SHORTENER_PATTERN.search(url):
                 score += 5  # Short URLs get lower score
             else:
                 score += 10
@@ -150,7 +286,7 @@ class DocumentDeduplicator:
             try:
                 # Assume newer updates are better
                 update_time = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-                days_old = (datetime.now().replace(tzinfo=update_time.tzinfo) - update_time).days
+                days_old = ((now or datetime.now()).replace(tzinfo=update_time.tzinfo) - update_time).days
                 if days_old < 30:
                     score += 10
                 elif days_old < 90:
@@ -160,31 +296,28 @@ class DocumentDeduplicator:
         
         return min(score, max_score)
     
-    def find_duplicate_groups(self, documents: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
-        """Find duplicate document groups"""
+    def find_duplicate_groups(self, documents: List[Dict[str, Any]],
+                              near_threshold: Optional[float] = None) -> List[List[Dict[str, Any]]]:
+        """Find duplicate document groups
+        
+        With near_threshold, documents not grouped by URL are matched by MinHash
+        similarity (see find_near_duplicate_groups) instead of pairwise titles.
+        """
         safe_print("Analyzing document duplicates...")
         
-        # Group by normalized URL
+        # Group by normalized URL; titles are compared below, for documents
+        # that no URL group claims
         url_groups = defaultdict(list)
-        title_groups = defaultdict(list)
         
         for doc in documents:
-            doc_id = doc.get('id')
-            if not doc_id:
+            if not doc.get('id'):
                 continue
                 
-            # URL grouping
             url = doc.get('source_url') or doc.get('url', '')
             if url:
                 normalized_url = self.normalize_url(url)
                 if normalized_url:
                     url_groups[normalized_url].append(doc)
-            
-            # Title grouping (for cases where URLs differ but content is same)
-            title = doc.get('title') or ''
-            title = title.strip() if title else ''
-            if title and len(title) > 10:  # Ignore titles that are too short
-                title_groups[title.lower()].append(doc)
         
         # Collect duplicate groups
         duplicate_groups = []
@@ -202,61 +335,147 @@ class DocumentDeduplicator:
         remaining_docs = [doc for doc in documents 
                          if doc.get('id') not in processed_ids]
         
+        if near_threshold is not None:
+            duplicate_groups.extend(self.find_near_duplicate_groups(remaining_docs, near_threshold))
+            safe_print(f"Found {len(duplicate_groups)} duplicate groups")
+            return duplicate_groups
+        
+        # Titles are normalized once instead of on every pairwise comparison
+        titles = [normalize_title(doc.get('title') or '') for doc in remaining_docs]
+        char_counts = [Counter(title) if LCSseq is None else None for title in titles]
+        threshold = self.similarity_threshold
+        # With rapidfuzz, each row's candidates come from one C scan over the
+        # titles not yet compared or grouped (None marks the rest)
+        pending = [title or None for title in titles] if fuzz_process is not None else None
+        
         for i, doc1 in enumerate(remaining_docs):
-            if doc1.get('id') in processed_ids:
+            if doc1.get('id') in processed_ids or not titles[i]:
                 continue
                 
             similar_docs = [doc1]
-            title1 = doc1.get('title', '')
+            title1, counts1 = titles[i], char_counts[i]
+            if pending is not None:
+                pending[i] = None
+                candidates = _title_candidates(title1, pending, threshold)
+            else:
+                candidates = range(i + 1, len(remaining_docs))
             
-            for doc2 in remaining_docs[i+1:]:
-                if doc2.get('id') in processed_ids:
+            for j in candidates:
+                doc2 = remaining_docs[j]
+                title2 = titles[j]
+                if not title2 or doc2.get('id') in processed_ids:
                     continue
-                    
-                title2 = doc2.get('title', '')
-                if self.calculate_title_similarity(title1, title2) >= self.similarity_threshold:
+                
+                # Cheap upper bounds on SequenceMatcher.ratio(), computed the same
+                # way as real_quick_ratio() and quick_ratio() (or from the longest
+                # common subsequence): pairs that cannot reach the threshold are
+                # skipped without building a matcher
+                length_sum = len(title1) + len(title2)
+                if 2.0 * min(len(title1), len(title2)) / length_sum < threshold:
+                    continue
+                if 2.0 * _shared_characters(title1, counts1, title2, char_counts[j]) / length_sum < threshold:
+                    continue
+                if difflib.SequenceMatcher(None, title1, title2).ratio() >= threshold:
                     similar_docs.append(doc2)
             
             if len(similar_docs) > 1:
                 duplicate_groups.append(similar_docs)
                 processed_ids.update(doc.get('id') for doc in similar_docs)
+                if pending is not None:
+                    for j in candidates:
+                        if remaining_docs[j].get('id') in processed_ids:
+                            pending[j] = None
         
         safe_print(f"Found {len(duplicate_groups)} duplicate groups")
         return duplicate_groups
     
+    def find_near_duplicate_groups(self, documents: List[Dict[str, Any]],
+                                   threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[List[Dict[str, Any]]]:
+        """Group documents whose title + author + summary shingles have an
+        estimated Jaccard similarity of at least threshold with the group's
+        first document.
+        
+        Documents are bucketed by banded LSH over their MinHash signatures, so
+        only candidates sharing a band are compared rather than every pair.
+        threshold must be in (0, 1]: at 0 every candidate pair matches.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"near-duplicate threshold must be in (0, 1], got {threshold}")
+        signatures = []
+        for doc in documents:
+            text = ' '.join(doc.get(field) or '' for field in ('title', 'author', 'summary'))
+            signatures.append(minhash_signature(normalize_title(text)))
+        
+        bands, rows = lsh_bands(threshold)
+        buckets = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            if signature:
+                for band in range(bands):
+                    buckets[(band, signature[band * rows:(band + 1) * rows])].append(index)
+        
+        # Anchored like the title pass: a group is its first document plus the
+        # later candidates whose estimated similarity to that document holds
+        # up. Every member is compared to the same document, so A~B and B~C
+        # never chain A and C into one group.
+        grouped = set()
+        groups = []
+        for anchor, signature in enumerate(signatures):
+            if not signature or anchor in grouped:
+                continue
+            candidates = set()
+            for band in range(bands):
+                candidates.update(buckets[(band, signature[band * rows:(band + 1) * rows])])
+            members = [anchor]
+            for other in sorted(candidates):
+                if other <= anchor or other in grouped:
+                    continue
+                matching = sum(x == y for x, y in zip(signature, signatures[other]))
+                if matching >= threshold * MINHASH_PERMUTATIONS:
+                    members.append(other)
+            if len(members) > 1:
+                grouped.update(members)
+                groups.append([documents[index] for index in members])
+        return groups
+    
     def select_best_document(self, duplicate_docs: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
         """Select the best version from duplicate documents"""
         if len(duplicate_docs) <= 1:
             return duplicate_docs[0] if duplicate_docs else None, []
         
-        # Calculate quality score for each document
-        scored_docs = []
-        for doc in duplicate_docs:
-            quality_score = self.calculate_metadata_quality_score(doc)
-            scored_docs.append((doc, quality_score))
-        
-        # Sort by quality score
-        scored_docs.sort(key=lambda x: x[1], reverse=True)
-        
+        scored_docs = self._rank_by_quality(duplicate_docs)
         best_doc = scored_docs[0][0]
         duplicates_to_remove = [doc for doc, _ in scored_docs[1:]]
         
         return best_doc, duplicates_to_remove
     
-    def analyze_duplicates(self, documents: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
-        """Analyze duplicate documents without performing deletion"""
+    def _rank_by_quality(self, docs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], float]]:
+        """(document, quality score) pairs, best first; each score is computed once"""
+        now = datetime.now()
+        scored_docs = [(doc, self.calculate_metadata_quality_score(doc, now)) for doc in docs]
+        scored_docs.sort(key=lambda x: x[1], reverse=True)
+        return scored_docs
+    
+    def analyze_duplicates(self, documents: Optional[Iterable[Dict[str, Any]]] = None,
+                           near_threshold: Optional[float] = None) -> Dict[str, Any]:
+        """Analyze duplicate documents without performing deletion
+        
+        documents may be any iterable; only the DEDUP_FIELDS of each are kept, so
+        passing API pages lazily frees the rest of every page as it is consumed.
+        near_threshold switches title matching to MinHash near-duplicate detection.
+        """
         if documents is None:
             safe_print("Fetching all documents...")
             from document_manager import DocumentManager
             doc_manager = DocumentManager(self.client)
-            documents = doc_manager.get_documents()
+            documents = itertools.chain.from_iterable(doc_manager.iter_documents())
+        documents = [slim_document(doc) for doc in documents]
         
         if not documents:
             return {"error": "No documents found"}
         
         safe_print(f"Starting analysis of {len(documents)} documents...")
         
-        duplicate_groups = self.find_duplicate_groups(documents)
+        duplicate_groups = self.find_duplicate_groups(documents, near_threshold=near_threshold)
         
         analysis_result = {
             "total_documents": len(documents),
@@ -266,7 +485,8 @@ class DocumentDeduplicator:
         }
         
         for i, group in enumerate(duplicate_groups):
-            best_doc, duplicates = self.select_best_document(group)
+            # Scores are computed once per document and reused for the report
+            (best_doc, best_score), *duplicates = self._rank_by_quality(group)
             
             group_info = {
                 "group_id": i + 1,
@@ -275,7 +495,7 @@ class DocumentDeduplicator:
                     "id": best_doc.get('id'),
                     "title": best_doc.get('title', ''),
                     "url": best_doc.get('source_url') or best_doc.get('url', ''),
-                    "quality_score": self.calculate_metadata_quality_score(best_doc),
+                    "quality_score": best_score,
                     "author": best_doc.get('author', ''),
                     "created_at": best_doc.get('created_at', ''),
                     "location": best_doc.get('location', '')
@@ -283,12 +503,12 @@ class DocumentDeduplicator:
                 "duplicates_to_remove": []
             }
             
-            for dup_doc in duplicates:
+            for dup_doc, dup_score in duplicates:
                 group_info["duplicates_to_remove"].append({
                     "id": dup_doc.get('id'),
                     "title": dup_doc.get('title', ''),
                     "url": dup_doc.get('source_url') or dup_doc.get('url', ''),
-                    "quality_score": self.calculate_metadata_quality_score(dup_doc),
+                    "quality_score": dup_score,
                     "author": dup_doc.get('author', ''),
                     "created_at": dup_doc.get('created_at', ''),
                     "location": dup_doc.get('location', '')
@@ -299,10 +519,15 @@ class DocumentDeduplicator:
         return analysis_result
     
     def remove_duplicates(self, 
-                         documents: Optional[List[Dict[str, Any]]] = None,
+                         documents: Optional[Iterable[Dict[str, Any]]] = None,
                          dry_run: bool = True,
-                         auto_confirm: bool = False) -> Dict[str, Any]:
-        """Execute deduplication operation"""
+                         auto_confirm: bool = False,
+                         delete_concurrency: int = 1) -> Dict[str, Any]:
+        """Execute deduplication operation
+        
+        Deletions go through ReadwiseClient.delete_documents, which keeps the
+        API rate limit; delete_concurrency only overlaps request latency.
+        """
         analysis = self.analyze_duplicates(documents)
         
         if analysis.get("error"):
@@ -338,7 +563,7 @@ class DocumentDeduplicator:
         if not auto_confirm:
             safe_print(f"\nDo you want to delete these {analysis['total_duplicates']} duplicate documents?")
             safe_print("Type 'yes' to confirm, any other input will cancel:")
-            confirmation = input().strip().lower()
+            confirmation = prompt_line().strip().lower()
             if confirmation != 'yes':
                 safe_print("Operation cancelled")
                 return {"message": "Operation cancelled", "removed_count": 0}
@@ -347,19 +572,16 @@ class DocumentDeduplicator:
         removed_count = 0
         failed_deletions = []
         
-        for group in analysis["groups"]:
-            for dup in group["duplicates_to_remove"]:
-                try:
-                    success = self.client.delete_document(dup["id"])
-                    if success:
-                        removed_count += 1
-                        safe_print(f"Deleted: {dup['title'][:50]}...")
-                    else:
-                        failed_deletions.append(dup["id"])
-                        safe_print(f"Failed to delete: {dup['title'][:50]}...")
-                except Exception as e:
-                    failed_deletions.append(dup["id"])
-                    safe_print(f"Delete error: {dup['title'][:50]}... - {e}")
+        duplicates = [dup for group in analysis["groups"] for dup in group["duplicates_to_remove"]]
+        results = self.client.delete_documents([dup["id"] for dup in duplicates],
+                                               max_workers=delete_concurrency)
+        for dup in duplicates:
+            if results.get(dup["id"]):
+                removed_count += 1
+                safe_print(f"Deleted: {dup['title'][:50]}...")
+            else:
+                failed_deletions.append(dup["id"])
+                safe_print(f"Failed to delete: {dup['title'][:50]}...")
         
         result = {
             "analysis": analysis,
@@ -422,31 +644,43 @@ class DocumentDeduplicator:
             # Fallback to simple normalization if parsing fails
             return self.normalize_url_simple(url)
     
-    def find_csv_duplicates(self, csv_file_path: str) -> Dict[str, Any]:
-        """Find duplicates in CSV file based on source_url without http/https"""
+    @staticmethod
+    def _group_csv_rows_by_url(csv_file_path: str, normalize) -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+        """(row count, rows grouped by normalize(source_url)) for the URLs shared
+        by more than one row, in order of first appearance.
+        
+        The file is read twice: the first pass keeps only each row's normalized
+        URL, the second keeps the rows of duplicate URLs. Unique rows (usually
+        most of an export) are never held, so memory follows the duplicates
+        rather than the whole CSV.
+        """
         import csv
         
-        safe_print(f"Analyzing duplicates in CSV file: {csv_file_path}")
+        with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
+            row_urls = []
+            for row in csv.DictReader(csvfile):
+                source_url = row.get('source_url', '').strip()
+                row_urls.append(normalize(source_url) if source_url else "")
         
-        documents = []
+        url_counts = Counter(row_urls)
         url_groups = defaultdict(list)
+        with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
+            for row_num, (row, normalized_url) in enumerate(zip(csv.DictReader(csvfile), row_urls), start=1):
+                if normalized_url and url_counts[normalized_url] > 1:
+                    url_groups[normalized_url].append({
+                        'row_number': row_num,
+                        'data': row
+                    })
+        return len(row_urls), url_groups
+    
+    def find_csv_duplicates(self, csv_file_path: str) -> Dict[str, Any]:
+        """Find duplicates in CSV file based on source_url without http/https"""
+        safe_print(f"Analyzing duplicates in CSV file: {csv_file_path}")
         
-        # Read CSV file
+        # Group by normalized source_url
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row_num, row in enumerate(reader, start=1):
-                    documents.append(row)
-                    
-                    # Group by normalized source_url
-                    source_url = row.get('source_url', '').strip()
-                    if source_url:
-                        normalized_url = self.normalize_url_simple(source_url)
-                        if normalized_url:
-                            url_groups[normalized_url].append({
-                                'row_number': row_num,
-                                'data': row
-                            })
+            total_documents, url_groups = self._group_csv_rows_by_url(
+                csv_file_path, self.normalize_url_simple)
         except Exception as e:
             return {"error": f"Failed to read CSV file: {e}"}
         
@@ -455,17 +689,16 @@ class DocumentDeduplicator:
         total_duplicates = 0
         
         for normalized_url, docs in url_groups.items():
-            if len(docs) > 1:
-                duplicate_groups.append({
-                    'normalized_url': normalized_url,
-                    'documents': docs,
-                    'count': len(docs)
-                })
-                total_duplicates += len(docs) - 1  # Subtract 1 because we keep one
+            duplicate_groups.append({
+                'normalized_url': normalized_url,
+                'documents': docs,
+                'count': len(docs)
+            })
+            total_duplicates += len(docs) - 1  # Subtract 1 because we keep one
         
         analysis_result = {
             "csv_file": csv_file_path,
-            "total_documents": len(documents),
+            "total_documents": total_documents,
             "duplicate_groups": len(duplicate_groups),
             "total_duplicates": total_duplicates,
             "groups": duplicate_groups
@@ -483,28 +716,12 @@ class DocumentDeduplicator:
         query string, fragment, and trailing slash. Title is NOT considered, so
         documents with similar titles but different URL paths stay separate.
         """
-        import csv
-
         safe_print(f"Analyzing duplicates in CSV file (intermediate mode): {csv_file_path}")
         safe_print("Rule: same URL after removing query string, fragment, and protocol")
 
-        documents = []
-        url_groups = defaultdict(list)
-
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row_num, row in enumerate(reader, start=1):
-                    documents.append(row)
-
-                    source_url = row.get('source_url', '').strip()
-                    if source_url:
-                        normalized_url = self.normalize_url_advanced(source_url)
-                        if normalized_url:
-                            url_groups[normalized_url].append({
-                                'row_number': row_num,
-                                'data': row
-                            })
+            total_documents, url_groups = self._group_csv_rows_by_url(
+                csv_file_path, self.normalize_url_advanced)
         except Exception as e:
             return {"error": f"Failed to read CSV file: {e}"}
 
@@ -512,18 +729,17 @@ class DocumentDeduplicator:
         total_duplicates = 0
 
         for normalized_url, docs in url_groups.items():
-            if len(docs) > 1:
-                duplicate_groups.append({
-                    'normalized_url': normalized_url,
-                    'documents': docs,
-                    'count': len(docs)
-                })
-                total_duplicates += len(docs) - 1
+            duplicate_groups.append({
+                'normalized_url': normalized_url,
+                'documents': docs,
+                'count': len(docs)
+            })
+            total_duplicates += len(docs) - 1
 
         analysis_result = {
             "csv_file": csv_file_path,
             "mode": "intermediate",
-            "total_documents": len(documents),
+            "total_documents": total_documents,
             "duplicate_groups": len(duplicate_groups),
             "total_duplicates": total_duplicates,
             "groups": duplicate_groups
@@ -608,6 +824,21 @@ class DocumentDeduplicator:
         
         safe_print(f"📊 Processing {len(documents)} documents for advanced duplicate detection...")
         
+        # Titles and URLs are normalized once per row instead of on every pairwise comparison
+        titles = [normalize_title(doc['data'].get('title', '').strip()) for doc in documents]
+        char_counts = [Counter(title) if LCSseq is None else None for title in titles]
+        urls = []
+        for doc in documents:
+            url = doc['data'].get('source_url', '').strip()
+            urls.append(self.normalize_url_advanced(url) if url else "")
+        # With rapidfuzz, a row's candidates are its title candidates (see
+        # _title_candidates) plus the later rows sharing its URL
+        pending = [title or None for title in titles] if fuzz_process is not None else None
+        url_rows = defaultdict(list)
+        for j, url in enumerate(urls):
+            if url:
+                url_rows[url].append(j)
+        
         for i, doc1 in enumerate(documents):
             if i in processed_indices:
                 continue
@@ -628,21 +859,34 @@ class DocumentDeduplicator:
             url_and_title_sims: List[float] = []
             title_only_sims: List[float] = []
 
-            title1 = doc1['data'].get('title', '').strip()
-            url1 = doc1['data'].get('source_url', '').strip()
-            normalized_url1 = self.normalize_url_advanced(url1) if url1 else ""
+            title1, counts1 = titles[i], char_counts[i]
+            normalized_url1 = urls[i]
+            if pending is not None:
+                pending[i] = None
+                candidates = set(_title_candidates(title1, pending, 0.5)) if title1 else set()
+                candidates.update(j for j in url_rows.get(normalized_url1, ()) if j > i)
+                candidates = sorted(candidates)
+            else:
+                candidates = range(i + 1, len(documents))
 
             # Find similar documents
-            for j, doc2 in enumerate(documents[i+1:], start=i+1):
+            for j in candidates:
                 if j in processed_indices:
                     continue
 
-                title2 = doc2['data'].get('title', '').strip()
-                url2 = doc2['data'].get('source_url', '').strip()
-                normalized_url2 = self.normalize_url_advanced(url2) if url2 else ""
+                doc2 = documents[j]
+                title2 = titles[j]
+                normalized_url2 = urls[j]
 
-                # Calculate title similarity
-                title_similarity = self.calculate_title_similarity(title1, title2) if (title1 and title2) else 0.0
+                # Calculate title similarity. Pairs whose real_quick_ratio() or
+                # quick_ratio() style upper bound cannot exceed 50% skip the
+                # SequenceMatcher; their similarity is not reported anyway.
+                title_similarity = 0.0
+                if title1 and title2:
+                    length_sum = len(title1) + len(title2)
+                    if (2.0 * min(len(title1), len(title2)) / length_sum > 0.5
+                            and 2.0 * _shared_characters(title1, counts1, title2, char_counts[j]) / length_sum > 0.5):
+                        title_similarity = difflib.SequenceMatcher(None, title1, title2).ratio()
                 same_normalized_url = bool(
                     normalized_url1 and normalized_url2 and normalized_url1 == normalized_url2
                 )
@@ -680,6 +924,9 @@ class DocumentDeduplicator:
                 })
                 total_duplicates += len(group) - 1
                 processed_indices.update(group_indices)
+                if pending is not None:
+                    for j in group_indices:
+                        pending[j] = None
         
         # Final progress update
         safe_print(f"✅ Processing complete: {len(documents)}/{len(documents)} documents processed (100.0%)")
@@ -712,55 +959,38 @@ class DocumentDeduplicator:
             mode_suffix = f"_{mode}" if mode in ("advanced", "intermediate") else ""
             output_file = f"readwise_duplicates{mode_suffix}_{timestamp}.csv"
         
-        try:
-            with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-                # Add extra fields for advanced mode
-                fieldnames = ['group_id', 'normalized_url', 'row_number', 'id', 'title', 'source_url', 'author', 'source', 'notes', 'tags', 'created_at', 'location']
-                if analysis.get("mode") == "advanced":
-                    fieldnames.insert(2, 'match_reason')     # Why these were grouped
-                    fieldnames.insert(3, 'example_urls')     # Sample URLs in group
-                    fieldnames.insert(4, 'example_titles')   # Sample titles in group
-                
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
+        advanced = analysis.get("mode") == "advanced"
+        # Advanced mode adds why each group was formed and a sample of its URLs and titles
+        advanced_fields = ('match_reason', 'example_urls', 'example_titles') if advanced else ()
+        fieldnames = ['group_id', 'normalized_url', *advanced_fields, 'row_number',
+                      *CSV_EXPORT_DATA_FIELDS]
+        
+        def rows():
+            """Rows in fieldnames order, built as tuples instead of dicts for DictWriter"""
+            for group_id, group in enumerate(analysis['groups'], start=1):
+                # For advanced mode, the group's details go on its first row only
+                first_row_extra = later_row_extra = ()
+                if advanced:
+                    first_row_extra = (
+                        group.get('match_reason', ''),
+                        " | ".join(group['example_urls'][:3]) if 'example_urls' in group else "",
+                        " | ".join(group['example_titles'][:3]) if 'example_titles' in group else "",
+                    )
+                    later_row_extra = ("", "", "")
                 
-                for group_id, group in enumerate(analysis['groups'], start=1):
-                    # For advanced mode, prepare additional info
-                    match_reason_str = ""
-                    example_urls_str = ""
-                    example_titles_str = ""
-                    
-                    if analysis.get("mode") == "advanced":
-                        match_reason_str = group.get('match_reason', '')
-                        if 'example_urls' in group:
-                            example_urls_str = " | ".join(group['example_urls'][:3])
-                        if 'example_titles' in group:
-                            example_titles_str = " | ".join(group['example_titles'][:3])
-                    
-                    for idx, doc_info in enumerate(group['documents']):
-                        row_data = doc_info['data']
-                        output_row = {
-                            'group_id': group_id,
-                            'normalized_url': group['normalized_url'],
-                            'row_number': doc_info['row_number'],
-                            'id': row_data.get('id', ''),
-                            'title': row_data.get('title', ''),
-                            'source_url': row_data.get('source_url', ''),
-                            'author': row_data.get('author', ''),
-                            'source': row_data.get('source', ''),
-                            'notes': row_data.get('notes', ''),
-                            'tags': row_data.get('tags', ''),
-                            'created_at': row_data.get('created_at', ''),
-                            'location': row_data.get('location', '')
-                        }
-                        
-                        # Add advanced mode fields only for the first row of each group
-                        if analysis.get("mode") == "advanced":
-                            output_row['match_reason'] = match_reason_str if idx == 0 else ""
-                            output_row['example_urls'] = example_urls_str if idx == 0 else ""
-                            output_row['example_titles'] = example_titles_str if idx == 0 else ""
-                        
-                        writer.writerow(output_row)
+                for idx, doc_info in enumerate(group['documents']):
+                    row_data = doc_info['data']
+                    yield (group_id, group['normalized_url'],
+                           *(later_row_extra if idx else first_row_extra),
+                           doc_info['row_number'],
+                           *[row_data.get(field, '') for field in CSV_EXPORT_DATA_FIELDS])
+        
+        try:
+            with open(output_file, 'w', newline='', encoding='utf-8',
+                      buffering=CSV_WRITE_BUFFER) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(fieldnames)
+                writer.writerows(rows())
             
             safe_print(f"Duplicate analysis exported to: {output_file}")
             return output_file
@@ -776,7 +1006,7 @@ class DocumentDeduplicator:
             filename = f"duplicate_analysis_{timestamp}.json"
         
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(analysis, f, ensure_ascii=False, indent=2)
+            write_json(analysis, f)
         
         safe_print(f"Analysis report exported to: {filename}")
         return filename 
@@ -979,10 +1209,15 @@ class DocumentDeduplicator:
         else:
             return "Oldest creation date" 
 
-    def execute_deletion_plan(self, csv_file_path: str, dry_run: bool = True, batch_size: int = 5) -> Dict[str, Any]:
-        """Execute deletion plan from CSV file"""
-        import csv
-        import time
+    def execute_deletion_plan(self, csv_file_path: str, dry_run: bool = True, batch_size: int = 5,
+                              max_retries: Optional[int] = None) -> Dict[str, Any]:
+        """Execute deletion plan from CSV file
+        
+        max_retries is how many times a document is retried after HTTP 429
+        (default PLAN_DELETE_MAX_RETRIES), each time after the Retry-After wait.
+        """
+        if max_retries is None:
+            max_retries = PLAN_DELETE_MAX_RETRIES
         import signal
         from datetime import datetime
         
@@ -992,17 +1227,15 @@ class DocumentDeduplicator:
         
         # Read deletion plan CSV
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    if row.get('action', '').upper() == 'DELETE':
-                        deletion_candidates.append({
-                            'document_id': row.get('document_id', ''),
-                            'title': row.get('title', ''),
-                            'source_url': row.get('source_url', ''),
-                            'reason': row.get('reason', ''),
-                            'group_id': row.get('group_id', '')
-                        })
+            for row in load_deletion_plan(csv_file_path):
+                if row.get('action', '').upper() == 'DELETE':
+                    deletion_candidates.append({
+                        'document_id': row.get('document_id', ''),
+                        'title': row.get('title', ''),
+                        'source_url': row.get('source_url', ''),
+                        'reason': row.get('reason', ''),
+                        'group_id': row.get('group_id', '')
+                    })
         except Exception as e:
             return {"error": f"Failed to read CSV file: {e}"}
         
@@ -1063,7 +1296,7 @@ class DocumentDeduplicator:
             elif hasattr(signal, 'SIGHUP') and signum == signal.SIGHUP:
                 signal_name = "Terminal hangup (SIGHUP)"
             
-            safe_print(f"\n\n🛑 {signal_name} detected - gracefully stopping after current document...")
+            safe_print(f"\n\n🛑 {signal_name} detected - gracefully stopping after current batch...")
             safe_print("⚠️  Please wait for safe completion...")
         
         # Register signal handlers for graceful shutdown across platforms
@@ -1094,66 +1327,28 @@ class DocumentDeduplicator:
                 batch = deletion_candidates[i:i+batch_size]
                 safe_print(f"\nProcessing batch {i//batch_size + 1}/{(len(deletion_candidates) + batch_size - 1)//batch_size}")
                 
+                # The batch is deleted concurrently through the client, whose shared
+                # limiter keeps request starts within 20 DELETE/minute and waits out
+                # a 429's Retry-After before retrying
+                batch_errors = {}
+                results = self.client.delete_documents(
+                    [doc['document_id'] for doc in batch], max_workers=len(batch),
+                    max_retries=max_retries, errors=batch_errors
+                )
+                
                 for doc in batch:
-                    if interrupted:
-                        safe_print("🛑 Stopping due to user interrupt...")
-                        break
-                        
                     safe_print(f"Deleting: [{doc['group_id']}] {doc['title'][:50]}...")
-                    
-                    # Implement retry logic for 429 errors (unlimited retries)
-                    retry_count = 0
-                    deletion_successful = False
-                    
-                    while not deletion_successful and not interrupted:
-                        try:
-                            result = self.client.delete_document(doc['document_id'])
-                            
-                            if result:
-                                successful_deletions += 1
-                                successfully_deleted_ids.add(doc['document_id'])
-                                safe_print(f"  ✅ Deleted successfully")
-                                deletion_successful = True
-                            else:
-                                failed_deletions += 1
-                                error_msg = "API returned failure status"
-                                errors.append(f"Document {doc['document_id']}: {error_msg}")
-                                safe_print(f"  ❌ Failed: {error_msg}")
-                                deletion_successful = True  # Don't retry for non-429 failures
-                        
-                        except Exception as e:
-                            error_msg = str(e)
-                            
-                            # Check if this is a 429 (rate limit) error
-                            if "429" in error_msg:
-                                retry_count += 1
-                                
-                                # Try to extract Retry-After value from error message
-                                retry_after = self._extract_retry_after(e)
-                                if retry_after:
-                                    safe_print(f"  ⚠️  Rate limited (429). Retry #{retry_count} after {retry_after}s...")
-                                    time.sleep(retry_after)
-                                else:
-                                    # Default retry delay if no Retry-After header
-                                    default_delay = 60  # 60 seconds default
-                                    safe_print(f"  ⚠️  Rate limited (429). Retry #{retry_count} after {default_delay}s (default)...")
-                                    time.sleep(default_delay)
-                                # Continue the loop to retry
-                            else:
-                                # Non-429 error - fail immediately
-                                failed_deletions += 1
-                                errors.append(f"Document {doc['document_id']}: {error_msg}")
-                                safe_print(f"  ❌ Exception: {error_msg}")
-                                deletion_successful = True  # Exit retry loop
-                    
-                    if interrupted:
-                        break
-                    
-                    # Respect Readwise Reader API rate limit: 20 requests per minute
-                    # Wait 3.5 seconds between requests to stay well under the limit
-                    if doc != batch[-1] or i + batch_size < len(deletion_candidates):
-                        safe_print(f"  ⏳ Waiting 3.5s to respect API rate limit (20 req/min)...")
-                        time.sleep(3.5)
+                    if results.get(doc['document_id']):
+                        successful_deletions += 1
+                        successfully_deleted_ids.add(doc['document_id'])
+                        safe_print(f"  ✅ Deleted successfully")
+                    else:
+                        # Messages keep the HTTP status so 404s (already deleted)
+                        # are dropped from the updated plan
+                        failed_deletions += 1
+                        error_msg = batch_errors.get(doc['document_id'], "API returned failure status")
+                        errors.append(f"Document {doc['document_id']}: {error_msg}")
+                        safe_print(f"  ❌ Failed: {error_msg}")
                 
                 if interrupted:
                     break
@@ -1214,9 +1409,8 @@ class DocumentDeduplicator:
         report_filename = f"readwise_deletion_execution_{timestamp}.json"
         
         try:
-            import json
             with open(report_filename, 'w', encoding='utf-8') as f:
-                json.dump(report_data, f, indent=2, ensure_ascii=False)
+                write_json(report_data, f)
             safe_print(f"Execution report saved to: {report_filename}")
         except Exception as e:
             safe_print(f"Warning: Could not save execution report: {e}")
@@ -1234,33 +1428,9 @@ class DocumentDeduplicator:
             "completion_status": completion_status
         }
     
-    def _extract_retry_after(self, exception: Exception) -> Optional[int]:
-        """Extract Retry-After value from HTTP exception"""
-        try:
-            # Check if this is a requests HTTPError with response object
-            response = getattr(exception, 'response', None)
-            if response is not None:
-                # Get Retry-After header (can be in seconds or HTTP date format)
-                retry_after = response.headers.get('Retry-After')
-                if retry_after:
-                    try:
-                        # Try to parse as integer (seconds)
-                        return int(retry_after)
-                    except ValueError:
-                        # If not integer, might be HTTP date format
-                        # For simplicity, return None and use default delay
-                        safe_print(f"    Warning: Could not parse Retry-After header: {retry_after}")
-                        return None
-            
-            return None
-        except Exception:
-            # If any error occurs during extraction, return None
-            return None
-    
     def _update_deletion_plan(self, original_csv_path: str, successfully_deleted_ids: set, errors: List[str]) -> Optional[str]:
         """Update deletion plan by removing successfully deleted and 404 documents"""
         import csv
-        import os
         from datetime import datetime
         
         # Extract document IDs that had 404 errors
@@ -1288,16 +1458,14 @@ class DocumentDeduplicator:
         total_original_rows = 0
         
         try:
-            with open(original_csv_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    total_original_rows += 1
-                    document_id = row.get('document_id', '').strip()
-                    action = row.get('action', '').upper()
-                    
-                    # Keep KEEP actions and DELETE actions that weren't processed
-                    if action == 'KEEP' or (action == 'DELETE' and document_id not in processed_document_ids):
-                        remaining_rows.append(row)
+            for row in load_deletion_plan(original_csv_path):
+                total_original_rows += 1
+                document_id = row.get('document_id', '').strip()
+                action = row.get('action', '').upper()
+                
+                # Keep KEEP actions and DELETE actions that weren't processed
+                if action == 'KEEP' or (action == 'DELETE' and document_id not in processed_document_ids):
+                    remaining_rows.append(row)
         
         except Exception as e:
             safe_print(f"Warning: Could not read original plan file: {e}")
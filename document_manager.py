@@ -1,11 +1,24 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator, TYPE_CHECKING
 from datetime import datetime
 import json
-import csv
 import sys
 import os
-from readwise_client import ReadwiseClient
-from config import Config
+import itertools
+
+try:
+    import orjson  # Optional: faster JSON output when installed
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    from readwise_client import ReadwiseClient
+
+# Write buffer for CSV exports, so large exports reach the disk in few syscalls
+CSV_WRITE_BUFFER = 1 << 20
+
+# Reader locations in display order; the frozenset is for membership checks.
+LOCATIONS = ('new', 'later', 'archive', 'feed')
+_LOCATION_SET = frozenset(LOCATIONS)
 
 # Set console encoding for Windows
 if os.name == 'nt':
@@ -28,11 +41,94 @@ def safe_print(text: str) -> None:
         print(safe_text, flush=True)
         sys.stdout.flush()
 
+def safe_write(text: str) -> None:
+    """Write a pre-joined block of output in one call, with safe_print's encoding fallback"""
+    try:
+        sys.stdout.write(text)
+    except UnicodeEncodeError:
+        sys.stdout.write(text.encode('utf-8', errors='replace').decode('utf-8'))
+    sys.stdout.flush()
+
+def write_json(data: Any, stream=None) -> None:
+    """Write data to stream (stdout by default) as indented JSON plus a newline,
+    serialized with orjson straight to the byte buffer when it is installed"""
+    stream = stream or sys.stdout
+    buffer = getattr(stream, 'buffer', None)
+    if orjson is not None and buffer is not None:
+        stream.flush()
+        buffer.write(orjson.dumps(
+            data,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        ))
+        buffer.flush()
+    else:
+        json.dump(data, stream, ensure_ascii=False, indent=2)
+        stream.write('\n')
+
+def dumps_indented(item: Any) -> str:
+    """Serialize item like json.dumps(item, ensure_ascii=False, indent=2), with
+    orjson when it is installed. The orjson text parses to the same value but
+    is not always byte-identical (small floats are written without exponents)"""
+    if orjson is not None:
+        return orjson.dumps(item, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(item, ensure_ascii=False, indent=2)
+
+def write_ndjson(items: Iterable[Any], stream=None) -> None:
+    """Write each item as one compact JSON line (NDJSON), item by item, using
+    orjson straight to the byte buffer when it is installed"""
+    stream = stream or sys.stdout
+    buffer = getattr(stream, 'buffer', None)
+    if orjson is not None and buffer is not None:
+        stream.flush()
+        buffer.writelines(
+            orjson.dumps(item, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+            for item in items
+        )
+        buffer.flush()
+    else:
+        stream.writelines(json.dumps(item, ensure_ascii=False) + '\n' for item in items)
+
+def prompt_line(message: str = '') -> str:
+    """Show a prompt and read one line from stdin without input()'s readline import.
+    Returns '' at end of input, which callers treat as "no"."""
+    safe_write(message)
+    return sys.stdin.readline().rstrip('\n')
+
+def confirm_key(message: str) -> bool:
+    """Ask a y/N question on stderr and answer it with a single key press, without
+    waiting for Enter. Meant for an interactive terminal on stdin; where neither
+    termios nor msvcrt exists it falls back to reading a line."""
+    sys.stderr.write(message)
+    sys.stderr.flush()
+    try:
+        import termios
+        import tty
+    except ImportError:
+        try:
+            import msvcrt
+        except ImportError:
+            answer = sys.stdin.readline()[:1]
+        else:
+            answer = msvcrt.getwch()
+    else:
+        fd = sys.stdin.fileno()
+        saved = termios.tcgetattr(fd)
+        try:
+            tty.setcbreak(fd)
+            answer = os.read(fd, 1).decode('utf-8', errors='replace')
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+    sys.stderr.write(answer.strip() + '\n')
+    return answer.lower() == 'y'
+
 class DocumentManager:
     """Readwise document manager"""
     
-    def __init__(self, client: Optional[ReadwiseClient] = None):
-        self.client = client or ReadwiseClient()
+    def __init__(self, client: Optional['ReadwiseClient'] = None):
+        if client is None:
+            from readwise_client import ReadwiseClient
+            client = ReadwiseClient()
+        self.client = client
         
     def add_article(self, url: str, title: Optional[str] = None, 
                    tags: Optional[List[str]] = None, location: str = "new") -> Dict[str, Any]:
@@ -109,32 +205,110 @@ class DocumentManager:
             safe_print(f"Found {len(documents)} documents")
         return documents
     
+    def iter_documents(self, location: Optional[str] = None,
+                       category: Optional[str] = None,
+                       tags: Optional[List[str]] = None,
+                       limit: Optional[int] = None,
+                       show_progress: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the documents get_documents would return, one API page at a time"""
+        if show_progress:
+            safe_print("Getting document list...")
+        
+        if limit and limit <= 100:
+            # Single API call is enough
+            if show_progress:
+                safe_print(f"Fetching up to {limit} documents...")
+            response = self.client.list_documents(
+                location=location,
+                category=category,
+                tags=tags
+            )
+            yield response.get('results', [])[:limit]
+            return
+        
+        if show_progress:
+            if limit:
+                print(f"Fetching up to {limit} documents (multiple requests needed)...")
+            else:
+                print("Fetching all documents (this may take a while with rate limiting)...")
+        yield from self.client.iter_document_pages(
+            location=location,
+            category=category,
+            max_documents=limit,
+            show_progress=show_progress
+        )
+    
+    def get_documents_by_location(self, jobs: int = 1,
+                                  locations: Tuple[str, ...] = LOCATIONS) -> List[Dict[str, Any]]:
+        """Fetch each location as its own paginated stream, up to jobs at a time.
+        At most one stream per location runs, so the worker count is capped at
+        len(locations). The delay between pages is multiplied by the worker
+        count so the combined request rate stays within the API limit while
+        request latencies overlap."""
+        from readwise_client import LIST_DELAY_SECONDS
+        
+        workers = max(1, min(jobs, len(locations)))
+        safe_print(f"Fetching {', '.join(locations)} with {workers} parallel workers...")
+        
+        def fetch(location: str) -> List[Dict[str, Any]]:
+            documents = self.client.get_all_documents(
+                location=location,
+                delay_seconds=LIST_DELAY_SECONDS * workers,
+                show_progress=False
+            )
+            safe_print(f"  {location}: {len(documents)} documents")
+            return documents
+        
+        # Imported here: cli imports this module for its output helpers, and
+        # concurrent.futures (with logging) would add to every command's startup
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            documents = list(itertools.chain.from_iterable(executor.map(fetch, locations)))
+        
+        safe_print(f"Found {len(documents)} documents")
+        return documents
+    
     def search_documents(self, keyword: str, 
                         location: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search documents (based on title)"""
         safe_print(f"Searching for documents containing '{keyword}'...")
         all_docs = self.get_documents(location=location)
         
-        matching_docs = []
-        for doc in all_docs:
-            title = doc.get('title', '').lower()
-            if keyword.lower() in title:
-                matching_docs.append(doc)
+        # Fold the keyword once; a plain substring test beats a compiled
+        # re.IGNORECASE pattern here. Titles may be null in the API response.
+        needle = keyword.casefold()
+        matching_docs = [doc for doc in all_docs
+                         if needle in (doc.get('title') or '').casefold()]
         
         print(f"Found {len(matching_docs)} matching documents")
         return matching_docs
     
     def move_document(self, document_id: str, location: str) -> Dict[str, Any]:
         """Move document to different location"""
-        valid_locations = ['new', 'later', 'archive', 'feed']
-        if location not in valid_locations:
-            raise ValueError(f"Invalid location: {location}. Valid locations: {valid_locations}")
+        if location not in _LOCATION_SET:
+            raise ValueError(f"Invalid location: {location}. Valid locations: {list(LOCATIONS)}")
         
         print(f"Moving document {document_id} to {location}")
         result = self.client.update_document(document_id, location=location)
         print(f"Document moved to {location}")
         return result
     
+    def move_documents(self, document_ids: List[str], location: str) -> Dict[str, bool]:
+        """Move several documents to a different location concurrently"""
+        if location not in _LOCATION_SET:
+            raise ValueError(f"Invalid location: {location}. Valid locations: {list(LOCATIONS)}")
+        
+        print(f"Moving {len(document_ids)} documents to {location}")
+        errors: Dict[str, str] = {}
+        results = self.client.move_documents(document_ids, location, errors=errors)
+        moved = sum(results.values())
+        print(f"Moved {moved}/{len(document_ids)} documents to {location}")
+        for document_id, success in results.items():
+            if not success:
+                reason = errors.get(document_id)
+                print(f"Move failed: {document_id}" + (f" ({reason})" if reason else ""))
+        return results
+    
     def update_document_metadata(self, document_id: str,
                                title: Optional[str] = None,
                                author: Optional[str] = None,
@@ -160,6 +334,17 @@ class DocumentManager:
             print("Delete failed")
         return result
     
+    def delete_documents(self, document_ids: List[str]) -> Dict[str, bool]:
+        """Delete several documents concurrently"""
+        print(f"Deleting {len(document_ids)} documents")
+        results = self.client.delete_documents(document_ids)
+        deleted = sum(results.values())
+        print(f"Deleted {deleted}/{len(document_ids)} documents")
+        for document_id, success in results.items():
+            if not success:
+                print(f"Delete failed: {document_id}")
+        return results
+    
     def archive_document(self, document_id: str) -> Dict[str, Any]:
         """Archive document"""
         return self.move_document(document_id, "archive")
@@ -190,11 +375,10 @@ class DocumentManager:
             'feed': 0
         }
         
-        # Get document count for each location
-        for location in ['new', 'later', 'archive', 'feed']:
+        # One request per location: the first page carries the total 'count',
+        # which is far cheaper than paging through every document
+        for location in LOCATIONS:
             try:
-                docs = self.get_documents(location=location, limit=1)
-                # Need to get total count, so use full API response
                 response = self.client.list_documents(location=location)
                 count = response.get('count', 0)
                 stats[location] = count
@@ -206,19 +390,47 @@ class DocumentManager:
         return stats
     
     def export_documents(self, location: Optional[str] = None, 
-                        filename: Optional[str] = None) -> str:
-        """Export documents to JSON file"""
-        docs = self.get_documents(location=location)
-        
+                        filename: Optional[str] = None,
+                        output_format: str = 'json',
+                        compress: bool = False) -> str:
+        """Export documents to a JSON array or NDJSON (one document per line) file,
+        writing each API page as it arrives. With compress, or a filename ending in
+        .gz, the file is gzip-compressed as it is written."""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             location_suffix = f"_{location}" if location else ""
-            filename = f"readwise_export{location_suffix}_{timestamp}.json"
+            filename = f"readwise_export{location_suffix}_{timestamp}.{output_format}"
+            if compress:
+                filename += '.gz'
+        
+        if compress or filename.endswith('.gz'):
+            import gzip
+            opener = gzip.open
+        else:
+            opener = open
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(docs, f, ensure_ascii=False, indent=2)
+        safe_print("Getting document list...")
+        pages = self.client.iter_document_pages(location=location)
+        count = 0
+        with opener(filename, 'wt', encoding='utf-8') as f:
+            if output_format == 'ndjson':
+                for page in pages:
+                    write_ndjson(page, f)
+                    count += len(page)
+            else:
+                # The same JSON as json.dump(docs, f, ensure_ascii=False, indent=2);
+                # byte-identical without orjson (orjson spells some floats
+                # differently, e.g. 0.00001 for 1e-05)
+                separator = '[\n  '
+                for page in pages:
+                    for doc in page:
+                        f.write(separator)
+                        f.write(dumps_indented(doc).replace('\n', '\n  '))
+                        separator = ',\n  '
+                    count += len(page)
+                f.write('\n]' if count else '[]')
         
-        print(f"Exported {len(docs)} documents to {filename}")
+        print(f"Exported {count} documents to {filename}")
         return filename
     
     def display_document_summary(self, document: Dict[str, Any]) -> None:
@@ -244,8 +456,9 @@ class DocumentManager:
         
         safe_print("-" * 30)
     
-    def export_documents_to_csv(self, documents: List[Dict[str, Any]], filename: Optional[str] = None) -> str:
-        """Export documents to CSV file with complete metadata"""
+    def export_documents_to_csv(self, documents: Iterable[Dict[str, Any]], filename: Optional[str] = None) -> str:
+        """Export documents to CSV file with complete metadata. documents may be any
+        iterable; each row is written as it is consumed"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"readwise_documents_{timestamp}.csv"
@@ -259,25 +472,25 @@ class DocumentManager:
             'parent_id', 'tags'
         ]
         
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=csv_fields)
-            writer.writeheader()
-            
+        count = 0
+        
+        def rows() -> Iterator[List[str]]:
+            nonlocal count
             for doc in documents:
-                # Prepare row data
-                row = {}
+                count += 1
+                row = []
                 for field in csv_fields:
                     if field == 'tags':
                         # Handle tags field specially - convert to comma-separated string
                         tags = doc.get('tags', {})
                         if isinstance(tags, dict) and tags:
                             tag_names = [tag_info.get('name', '') for tag_info in tags.values() if isinstance(tag_info, dict)]
-                            row[field] = ', '.join(tag_names) if tag_names else ''
+                            row.append(', '.join(tag_names) if tag_names else '')
                         elif isinstance(tags, list):
                             tag_names = [tag.get('name', '') if isinstance(tag, dict) else str(tag) for tag in tags]
-                            row[field] = ', '.join(tag_names) if tag_names else ''
+                            row.append(', '.join(tag_names) if tag_names else '')
                         else:
-                            row[field] = ''
+                            row.append('')
                     else:
                         # Handle all other fields
                         value = doc.get(field, '')
@@ -288,10 +501,15 @@ class DocumentManager:
                         elif isinstance(value, (dict, list)):
                             value = json.dumps(value, ensure_ascii=False)
                         # Clean up string values - replace newlines with spaces for CSV compatibility
-                        value = str(value).replace('\n', ' ').replace('\r', ' ')
-                        row[field] = value
-                
-                writer.writerow(row)
+                        row.append(str(value).replace('\n', ' ').replace('\r', ' '))
+                yield row
+        
+        import csv
+        # Rows are produced lazily and reach the disk in 1 MiB writes
+        with open(filename, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(csv_fields)
+            writer.writerows(rows())
         
-        safe_print(f"Exported {len(documents)} documents to CSV: {filename}")
+        safe_print(f"Exported {count} documents to CSV: {filename}")
         return filename 
\ No newline at end of file
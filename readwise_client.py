@@ -1,27 +1,141 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import math
 import time
-from typing import List, Dict, Optional, Any
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Iterator, Callable
 from datetime import datetime
 from config import Config
 
+# Pause between paginated list requests: the API allows 20 requests/minute
+LIST_DELAY_SECONDS = 3.0
+
+# Reader's documented limit for DELETE requests
+DELETE_REQUESTS_PER_MINUTE = 20
+
+# Document UPDATE requests have a higher documented limit
+UPDATE_REQUESTS_PER_MINUTE = 50
+
+class RateLimiter:
+    """Spaces request starts evenly across threads to stay within a per-minute budget"""
+    
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+    
+    def wait(self) -> None:
+        """Block until the caller may start its next request"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+    
+    def pause(self, seconds: float) -> None:
+        """Hold back every waiting thread, e.g. after the server answered 429"""
+        with self._lock:
+            self._next_start = max(self._next_start, time.monotonic() + seconds)
+
 class ReadwiseClient:
     """Readwise Reader API client"""
     
     def __init__(self, config: Config = None):
         self.config = config or Config()
+        # One session per client so every call in a process reuses the pooled
+        # keep-alive connection instead of a new TCP+TLS handshake per request
+        self.session = requests.Session()
+        # Transient gateway errors are retried with backoff on idempotent
+        # methods. Retry-After is not honoured here because urllib3 would then
+        # also retry 429s; those are left to the callers' rate-limit handling.
+        retry = Retry(total=5, backoff_factor=0.3,
+                      status_forcelist=(502, 503, 504), raise_on_status=False,
+                      respect_retry_after_header=False)
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32,
+                                                   max_retries=retry))
+        # Shared by all bulk deletes from this client, whatever their concurrency
+        self.delete_limiter = RateLimiter(DELETE_REQUESTS_PER_MINUTE)
+        self.update_limiter = RateLimiter(UPDATE_REQUESTS_PER_MINUTE)
+        # Any 401 means the cached "token verified" entry can no longer be trusted
+        self.session.hooks['response'].append(self._forget_verification_on_401)
+    
+    def close(self) -> None:
+        """Close the pooled connections held by this client's session"""
+        self.session.close()
+        
+    def verify_token(self, max_age: Optional[float] = None) -> bool:
+        """Verify if API token is valid
+        
+        With max_age, a successful verification of the same token in the last
+        max_age seconds is reused from the on-disk cache instead of calling the API.
+        """
+        if max_age is not None and self._read_cache('verified.json', max_age):
+            return True
         
-    def verify_token(self) -> bool:
-        """Verify if API token is valid"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 self.config.auth_url,
                 headers=self.config.get_headers()
             )
-            return response.status_code == 204
+            valid = response.status_code == 204
         except Exception as e:
             print(f"Error verifying token: {e}")
             return False
+        
+        if valid and max_age is not None:
+            self._write_cache('verified.json', True)
+        return valid
+    
+    def _verify_cache_file(self) -> str:
+        return os.path.join(self.config.cache_dir, 'verified.json')
+    
+    def _token_hash(self) -> str:
+        return hashlib.sha256(self.config.api_token.encode('utf-8')).hexdigest()
+    
+    def _read_cache(self, name: str, max_age: float) -> Optional[Any]:
+        """Data cached under name for the current token, if written in the last max_age seconds"""
+        path = os.path.join(self.config.cache_dir, name)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if not 0 <= age < max_age:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached['token_hash'] != self._token_hash():
+                return None
+            return cached['data']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def _write_cache(self, name: str, data: Any) -> None:
+        # Written to a temporary file and renamed so a concurrent reader never
+        # sees a partial file; the cache only saves round-trips, so failures
+        # are not errors
+        path = os.path.join(self.config.cache_dir, name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.config.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'token_hash': self._token_hash(), 'data': data}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
+    def _forget_verification_on_401(self, response: requests.Response, *args, **kwargs) -> None:
+        if response.status_code == 401:
+            try:
+                os.remove(self._verify_cache_file())
+            except OSError:
+                pass
     
     def save_document(self, 
                      url: str,
@@ -67,7 +181,7 @@ class ReadwiseClient:
             data["notes"] = notes
             
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.config.base_url}/save/",
                 headers=self.config.get_headers(),
                 json=data
@@ -109,7 +223,7 @@ class ReadwiseClient:
             params["pageCursor"] = page_cursor
             
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.config.base_url}/list/",
                 headers=self.config.get_headers(),
                 params=params
@@ -124,7 +238,7 @@ class ReadwiseClient:
                          location: Optional[str] = None,
                          category: Optional[str] = None,
                          updated_after: Optional[str] = None,
-                         delay_seconds: float = 3.0,
+                         delay_seconds: float = LIST_DELAY_SECONDS,
                          max_documents: Optional[int] = None,
                          show_progress: bool = True) -> List[Dict[str, Any]]:
         """Get all documents (handle pagination with rate limiting)
@@ -139,6 +253,27 @@ class ReadwiseClient:
         """
         
         all_documents = []
+        for page in self.iter_document_pages(location=location,
+                                             category=category,
+                                             updated_after=updated_after,
+                                             delay_seconds=delay_seconds,
+                                             max_documents=max_documents,
+                                             show_progress=show_progress):
+            all_documents.extend(page)
+        return all_documents
+    
+    def iter_document_pages(self,
+                            location: Optional[str] = None,
+                            category: Optional[str] = None,
+                            updated_after: Optional[str] = None,
+                            delay_seconds: float = LIST_DELAY_SECONDS,
+                            max_documents: Optional[int] = None,
+                            show_progress: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """Yield documents one API page at a time, with the same rate limiting and
+        progress output as get_all_documents, so callers can process each page as it
+        arrives instead of holding the whole library in memory"""
+        
+        fetched_count = 0
         next_page_cursor = None
         request_count = 0
         start_time = time.time()
@@ -158,22 +293,28 @@ class ReadwiseClient:
             print(f"📚 Starting document retrieval{filter_str}...")
             print(f"⏱️  Rate limiting: {delay_seconds}s delay between batches")
         
+        last_request_start = 0.0
+        
         while True:
             try:
-                # Add delay between requests to respect rate limits (20 requests/minute = 3s between requests)
-                if request_count > 0:
+                # Add delay between requests to respect rate limits (20 requests/minute = 3s between requests).
+                # The delay runs from the previous request's start, so the round-trip and
+                # the time the caller spent on the last yielded page count towards it.
+                wait = delay_seconds - (time.monotonic() - last_request_start)
+                if request_count > 0 and wait > 0:
                     if show_progress:
                         # Show countdown for rate limiting
-                        for remaining in range(int(delay_seconds), 0, -1):
+                        for remaining in range(math.ceil(wait), 0, -1):
                             print(f"\r⏳ Waiting {remaining}s (API rate limiting)...", end="", flush=True)
-                            time.sleep(1)
+                            time.sleep(min(1.0, wait - (remaining - 1)))
                         print()  # New line after countdown
                     else:
-                        time.sleep(delay_seconds)
+                        time.sleep(wait)
                 
                 if show_progress:
                     print(f"🔄 Fetching batch {request_count + 1}...", end="", flush=True)
                 
+                last_request_start = time.monotonic()
                 response = self.list_documents(
                     location=location,
                     category=category,
@@ -183,31 +324,26 @@ class ReadwiseClient:
                 
                 request_count += 1
                 results = response.get('results', [])
-                all_documents.extend(results)
                 next_page_cursor = response.get('nextPageCursor')
                 
+                # Check if we've reached the maximum number of documents
+                reached_limit = bool(max_documents) and fetched_count + len(results) >= max_documents
+                if reached_limit:
+                    results = results[:max_documents - fetched_count]
+                fetched_count += len(results)
+                
                 # Calculate progress statistics
                 elapsed_time = time.time() - start_time
                 avg_time_per_batch = elapsed_time / request_count if request_count > 0 else 0
                 
                 if show_progress:
-                    print(f"\r✅ Batch {request_count} completed: {len(results)} documents (total: {len(all_documents)})")
+                    print(f"\r✅ Batch {request_count} completed: {len(results)} documents (total: {fetched_count})")
                     print(f"📊 Elapsed: {elapsed_time:.1f}s, avg per batch: {avg_time_per_batch:.1f}s")
                     
                     if next_page_cursor:
                         print(f"🔗 More data available, preparing next batch...")
                     else:
                         print(f"🎉 All available data retrieved!")
-                
-                # Check if we've reached the maximum number of documents
-                if max_documents and len(all_documents) >= max_documents:
-                    all_documents = all_documents[:max_documents]
-                    if show_progress:
-                        print(f"🛑 Reached maximum document limit ({max_documents}), stopping...")
-                    break
-                
-                if not next_page_cursor:
-                    break
                     
             except requests.exceptions.RequestException as e:
                 if hasattr(e, 'response') and e.response is not None:
@@ -225,9 +361,19 @@ class ReadwiseClient:
                 if show_progress:
                     print(f"❌ Error fetching documents: {e}")
                 raise
+            
+            yield results
+            
+            if reached_limit:
+                if show_progress:
+                    print(f"🛑 Reached maximum document limit ({max_documents}), stopping...")
+                break
+            
+            if not next_page_cursor:
+                break
                 
-        print(f"Completed fetching {len(all_documents)} documents in {request_count} requests")
-        return all_documents
+        if show_progress:
+            print(f"Completed fetching {fetched_count} documents in {request_count} requests")
     
     def update_document(self,
                        document_id: str,
@@ -258,31 +404,105 @@ class ReadwiseClient:
             data["category"] = category
             
         try:
-            response = requests.patch(
-                f"{self.config.base_url}/update/{document_id}/",
-                headers=self.config.get_headers(),
-                json=data
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._update_document(document_id, data)
         except requests.exceptions.RequestException as e:
             print(f"Error updating document: {e}")
             raise
     
+    def _update_document(self, document_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """update_document without the error print, for bulk moves on worker
+        threads, which report failures through their errors dict like deletes"""
+        response = self.session.patch(
+            f"{self.config.base_url}/update/{document_id}/",
+            headers=self.config.get_headers(),
+            json=data
+        )
+        response.raise_for_status()
+        return response.json()
+    
     def delete_document(self, document_id: str) -> bool:
         """Delete document"""
         
         try:
-            response = requests.delete(
-                f"{self.config.base_url}/delete/{document_id}/",
-                headers=self.config.get_headers()
-            )
-            response.raise_for_status()
-            return response.status_code == 204
+            return self._delete_document(document_id)
         except requests.exceptions.RequestException as e:
             print(f"Error deleting document: {e}")
             raise
     
+    def _delete_document(self, document_id: str) -> bool:
+        """delete_document without the error print. Bulk deletes run it on worker
+        threads and report failures through their errors dict, so a retried 429
+        prints nothing and no output interleaves with the caller's"""
+        response = self.session.delete(
+            f"{self.config.base_url}/delete/{document_id}/",
+            headers=self.config.get_headers()
+        )
+        response.raise_for_status()
+        return response.status_code == 204
+    
+    def delete_documents(self, document_ids: List[str], max_workers: int = 10,
+                         max_retries: int = 3,
+                         errors: Optional[Dict[str, str]] = None) -> Dict[str, bool]:
+        """Delete several documents concurrently, at most max_workers requests in flight.
+        Request starts are paced by delete_limiter; a 429 pauses all workers for the
+        server's Retry-After and the document is retried up to max_retries times.
+        Returns a mapping of document ID to whether its deletion succeeded; when an
+        errors dict is given, the error message of each failed request is stored in it."""
+        return self._paced_calls(document_ids, self._delete_document, self.delete_limiter,
+                                 max_workers, max_retries, errors)
+    
+    def move_documents(self, document_ids: List[str], location: str, max_workers: int = 10,
+                       max_retries: int = 3,
+                       errors: Optional[Dict[str, str]] = None) -> Dict[str, bool]:
+        """Move several documents to location concurrently, paced by update_limiter
+        and retried on 429 like delete_documents. Returns a mapping of document ID
+        to whether its move succeeded; when an errors dict is given, the error
+        message of each failed request is stored in it."""
+        data = {"location": location}
+        
+        def move_one(document_id: str) -> bool:
+            self._update_document(document_id, data)
+            return True
+        
+        return self._paced_calls(document_ids, move_one, self.update_limiter,
+                                 max_workers, max_retries, errors)
+    
+    def _paced_calls(self, document_ids: List[str], call: Callable[[str], bool],
+                     limiter: RateLimiter, max_workers: int, max_retries: int,
+                     errors: Optional[Dict[str, str]] = None) -> Dict[str, bool]:
+        """Run call for each document ID on a thread pool, starting each request
+        through limiter and retrying 429s after the server's Retry-After. Any
+        other exception fails only its own document, so one bad response (such
+        as a non-JSON body) never discards the results of the others."""
+        
+        def call_one(document_id: str) -> bool:
+            for attempt in range(max_retries + 1):
+                limiter.wait()
+                try:
+                    return call(document_id)
+                except Exception as e:
+                    response = getattr(e, 'response', None)
+                    if (not isinstance(e, requests.exceptions.RequestException) or response is None
+                            or response.status_code != 429 or attempt == max_retries):
+                        if errors is not None:
+                            errors[document_id] = str(e)
+                        return False
+                    limiter.pause(self._retry_after(response))
+            return False
+        
+        if not document_ids:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(document_ids)))) as executor:
+            return dict(zip(document_ids, executor.map(call_one, document_ids)))
+    
+    @staticmethod
+    def _retry_after(response: requests.Response, default: float = 60.0) -> float:
+        """Seconds to wait from a 429 response's Retry-After header"""
+        try:
+            return max(0.0, float(response.headers.get('Retry-After', default)))
+        except ValueError:
+            return default
+    
     def list_tags(self, page_cursor: Optional[str] = None) -> Dict[str, Any]:
         """List all tags"""
         
@@ -291,7 +511,7 @@ class ReadwiseClient:
             params["pageCursor"] = page_cursor
             
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.config.base_url}/tags/",
                 headers=self.config.get_headers(),
                 params=params
@@ -302,12 +522,20 @@ class ReadwiseClient:
             print(f"Error listing tags: {e}")
             raise
     
-    def get_all_tags(self, delay_seconds: float = 3.0) -> List[Dict[str, str]]:
+    def get_all_tags(self, delay_seconds: float = LIST_DELAY_SECONDS,
+                     max_age: Optional[float] = None) -> List[Dict[str, str]]:
         """Get all tags (handle pagination with rate limiting)
         
         Args:
             delay_seconds: Delay between API calls to respect rate limits (default 3s)
+            max_age: Reuse tags cached on disk for the same token if fetched within
+                this many seconds. 0 always refetches but still refreshes the cache;
+                None bypasses the cache entirely.
         """
+        if max_age:
+            cached = self._read_cache('tags.json', max_age)
+            if cached is not None:
+                return cached
         
         all_tags = []
         next_page_cursor = None
@@ -335,5 +563,7 @@ class ReadwiseClient:
                         time.sleep(60)
                         continue
                 raise
-                
-        return all_tags 
\ No newline at end of file
+        
+        if max_age is not None:
+            self._write_cache('tags.json', all_tags)
+        return all_tags
@@ -1,17 +1,25 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, TYPE_CHECKING
 from collections import Counter
-from readwise_client import ReadwiseClient
+
+if TYPE_CHECKING:
+    from readwise_client import ReadwiseClient
 
 class TagManager:
     """Readwise tag manager"""
     
-    def __init__(self, client: Optional[ReadwiseClient] = None):
-        self.client = client or ReadwiseClient()
+    def __init__(self, client: Optional['ReadwiseClient'] = None,
+                 cache_max_age: Optional[float] = None):
+        if client is None:
+            from readwise_client import ReadwiseClient
+            client = ReadwiseClient()
+        self.client = client
+        # Seconds a tag list cached on disk stays fresh (0 = refetch, None = no cache)
+        self.cache_max_age = cache_max_age
         
     def get_all_tags(self) -> List[Dict[str, str]]:
         """Get all tags"""
         print("Getting all tags...")
-        tags = self.client.get_all_tags()
+        tags = self.client.get_all_tags(max_age=self.cache_max_age)
         print(f"Found {len(tags)} tags")
         return tags
     
@@ -32,13 +40,13 @@ class TagManager:
         all_tags = self.get_all_tags()
         
         matching_tags = []
-        keyword_lower = keyword.lower()
+        keyword_folded = keyword.casefold()
         
         for tag in all_tags:
-            tag_name = tag.get('name', '').lower()
-            tag_key = tag.get('key', '').lower()
+            tag_name = (tag.get('name') or '').casefold()
+            tag_key = (tag.get('key') or '').casefold()
             
-            if keyword_lower in tag_name or keyword_lower in tag_key:
+            if keyword_folded in tag_name or keyword_folded in tag_key:
                 matching_tags.append(tag)
         
         print(f"Found {len(matching_tags)} matching tags")
@@ -6,16 +6,23 @@ import argparse
 from cli import ReadwiseCLI
 
 
+def build_parser_args(argv):
+    """Parse argv with the real CLI parser"""
+    from cli import build_parser
+    return build_parser(argv[0]).parse_args(argv)
+
+
 class TestReadwiseCLI:
     """Test cases for ReadwiseCLI"""
     
     @pytest.fixture
     def mock_dependencies(self):
         """Mock all CLI dependencies"""
-        with patch('cli.Config') as mock_config, \
-             patch('cli.ReadwiseClient') as mock_client, \
-             patch('cli.DocumentManager') as mock_doc_manager, \
-             patch('cli.TagManager') as mock_tag_manager:
+        # ReadwiseCLI imports its collaborators lazily, so patch them at source.
+        with patch('config.Config') as mock_config, \
+             patch('readwise_client.ReadwiseClient') as mock_client, \
+             patch('document_manager.DocumentManager') as mock_doc_manager, \
+             patch('tag_manager.TagManager') as mock_tag_manager:
             
             # Create mock instances
             mock_config_instance = Mock()
@@ -51,7 +58,7 @@ class TestReadwiseCLI:
     
     def test_init_failure(self):
         """Test CLI initialization failure"""
-        with patch('cli.Config', side_effect=ValueError('No token found')):
+        with patch('config.Config', side_effect=ValueError('No token found')):
             with pytest.raises(SystemExit) as exc_info:
                 ReadwiseCLI()
             assert exc_info.value.code == 1
@@ -90,7 +97,7 @@ class TestReadwiseCLI:
         args = Mock()
         args.url = 'https://example.com'
         args.title = 'Test Article'
-        args.tags = 'python,testing'
+        args.tags = ('python', 'testing')
         args.location = 'new'
         
         cli.add_article(args)
@@ -99,13 +106,22 @@ class TestReadwiseCLI:
         mock_dependencies['doc_manager'].add_article.assert_called_once_with(
             url='https://example.com',
             title='Test Article',
-            tags=['python', 'testing'],
+            tags=('python', 'testing'),
             location='new'
         )
         
         captured = capsys.readouterr()
         assert "Successfully added article: https://example.com" in captured.out
     
+    def test_add_tags_parsed_once(self):
+        """--tags is split and stripped at parse time; blank entries are dropped"""
+        from cli import build_parser
+        args = build_parser('add').parse_args(
+            ['add', 'https://example.com', '--tags', ' python, testing ,,']
+        )
+        assert args.tags == ('python', 'testing')
+        assert build_parser('add').parse_args(['add', 'https://example.com']).tags is None
+    
     def test_add_article_no_tags(self, mock_dependencies):
         """Test adding an article without tags"""
         mock_dependencies['doc_manager'].add_article.return_value = {
@@ -142,10 +158,19 @@ class TestReadwiseCLI:
         args.tags = None
         args.location = 'new'
         
-        cli.add_article(args)
+        args.handler = 'add_article'
+        args.failure = 'Failed to add article'
+        args.show_traceback = False
+        
+        # Command methods let errors propagate; run_command reports them once
+        with pytest.raises(Exception, match='Network error'):
+            cli.add_article(args)
+        
+        from cli import run_command
+        assert run_command(cli, args) is False
         
         captured = capsys.readouterr()
-        assert "Failed to add article: Network error" in captured.out
+        assert "Failed to add article: Network error" in captured.err
     
     def test_list_documents(self, mock_dependencies):
         """Test listing documents"""
@@ -160,13 +185,13 @@ class TestReadwiseCLI:
         args.no_progress = True  # Add missing no_progress attribute
         
         # Mock the return value to avoid iteration issues
-        mock_dependencies['doc_manager'].get_documents.return_value = [
+        mock_dependencies['doc_manager'].iter_documents.return_value = iter([[
             {'id': '123', 'title': 'Test', 'source_url': 'http://test.com', 'location': 'new', 'updated_at': '2023-01-01'}
-        ]
+        ]])
         
         cli.list_documents(args)
         
-        mock_dependencies['doc_manager'].get_documents.assert_called_once_with(
+        mock_dependencies['doc_manager'].iter_documents.assert_called_once_with(
             location='new',
             category='article',
             limit=10,
@@ -198,7 +223,7 @@ class TestReadwiseCLI:
         cli = ReadwiseCLI()
         
         args = Mock()
-        args.id = '12345'
+        args.id = ['12345']
         args.force = True  # Skip confirmation
         
         mock_dependencies['doc_manager'].delete_document.return_value = True
@@ -207,12 +232,91 @@ class TestReadwiseCLI:
         
         mock_dependencies['doc_manager'].delete_document.assert_called_once_with('12345')
     
+    def test_delete_multiple_documents(self, mock_dependencies):
+        """Several IDs go through the concurrent bulk delete"""
+        cli = ReadwiseCLI()
+        
+        args = Mock()
+        args.id = ['1', '2', '3']
+        args.force = False
+        
+        with patch('sys.stdin.isatty', return_value=True), \
+             patch('cli.confirm_key', return_value=True) as mock_confirm:
+            cli.delete_document(args)
+        
+        mock_dependencies['doc_manager'].delete_documents.assert_called_once_with(['1', '2', '3'])
+        mock_dependencies['doc_manager'].delete_document.assert_not_called()
+        assert 'delete 3 documents? (y/N)' in mock_confirm.call_args[0][0]
+    
+    def test_delete_document_confirmation(self, mock_dependencies, capsys):
+        """Without --force a terminal is asked for a key press; piped stdin is refused"""
+        cli = ReadwiseCLI()
+        
+        args = Mock()
+        args.id = ['12345']
+        args.force = False
+        
+        with patch('sys.stdin', StringIO('y\n')):
+            with pytest.raises(ValueError, match='without --force'):
+                cli.delete_document(args)
+        mock_dependencies['doc_manager'].delete_document.assert_not_called()
+        
+        with patch('sys.stdin.isatty', return_value=True), \
+             patch('cli.confirm_key', return_value=False):
+            cli.delete_document(args)
+        mock_dependencies['doc_manager'].delete_document.assert_not_called()
+        assert 'Delete cancelled' in capsys.readouterr().out
+        
+        mock_dependencies['doc_manager'].delete_document.return_value = True
+        with patch('sys.stdin.isatty', return_value=True), \
+             patch('cli.confirm_key', return_value=True) as mock_confirm:
+            cli.delete_document(args)
+        mock_dependencies['doc_manager'].delete_document.assert_called_once_with('12345')
+        mock_confirm.assert_called_once_with('Are you sure you want to delete document 12345? (y/N): ')
+        assert 'Document deleted' in capsys.readouterr().out
+    
+    def test_bulk_deletions_refuse_piped_stdin_without_force(self, mock_dependencies, tmp_path):
+        """execute-deletion --execute and remove-duplicates --execute need --force when scripted"""
+        plan = tmp_path / 'plan.csv'
+        plan.write_text('action,document_id\n', encoding='utf-8')
+        cli = ReadwiseCLI()
+
+        with patch('document_deduplicator.DocumentDeduplicator') as mock_dedup_class, \
+             patch('sys.stdin', StringIO('DELETE\nyes\n')):
+            with pytest.raises(ValueError, match='without --force'):
+                cli.execute_deletion(build_parser_args(['execute-deletion', str(plan), '--execute']))
+            with pytest.raises(ValueError, match='without --force'):
+                cli.remove_duplicates(build_parser_args(['remove-duplicates', '--execute']))
+
+            mock_dedup_class.return_value.execute_deletion_plan.assert_not_called()
+            mock_dedup_class.return_value.remove_duplicates.assert_not_called()
+            mock_dependencies['doc_manager'].get_documents.assert_not_called()
+
+    def test_execute_deletion_missing_plan(self, mock_dependencies, tmp_path, capsys):
+        """A missing plan is reported before any prompt; the parsed plan is reused"""
+        from document_deduplicator import _read_plan_rows
+        cli = ReadwiseCLI()
+        missing = tmp_path / 'missing.csv'
+        plan = tmp_path / 'plan.csv'
+        plan.write_text('action,document_id\nKEEP,k1\n', encoding='utf-8')
+
+        with patch('document_deduplicator.DocumentDeduplicator') as mock_dedup_class:
+            cli.execute_deletion(build_parser_args(['execute-deletion', str(missing), '--execute']))
+            assert f"Error: File not found: {missing}" in capsys.readouterr().out
+            mock_dedup_class.return_value.execute_deletion_plan.assert_not_called()
+
+        _read_plan_rows.cache_clear()
+        cli = ReadwiseCLI()
+        cli.execute_deletion(build_parser_args(['execute-deletion', str(plan)]))
+        assert 'No documents marked for deletion' in capsys.readouterr().out
+        assert _read_plan_rows.cache_info().misses == 1
+
     def test_update_document(self, mock_dependencies):
         """Test updating a document"""
         cli = ReadwiseCLI()
         
         args = Mock()
-        args.id = '12345'
+        args.id = ['12345']
         args.location = 'archive'
         args.title = None
         args.author = None
@@ -224,6 +328,17 @@ class TestReadwiseCLI:
         
         mock_dependencies['doc_manager'].move_document.assert_called_once_with('12345', 'archive')
     
+    def test_update_multiple_documents(self, mock_dependencies):
+        """Several IDs are moved concurrently; metadata edits stay single-document"""
+        cli = ReadwiseCLI()
+        
+        cli.update_document(build_parser_args(['update', '1', '2', '--location', 'archive']))
+        mock_dependencies['doc_manager'].move_documents.assert_called_once_with(['1', '2'], 'archive')
+        mock_dependencies['doc_manager'].move_document.assert_not_called()
+        
+        with pytest.raises(ValueError):
+            cli.update_document(build_parser_args(['update', '1', '2', '--title', 'T']))
+    
     def test_export_documents(self, mock_dependencies):
         """Test exporting documents"""
         cli = ReadwiseCLI()
@@ -231,6 +346,8 @@ class TestReadwiseCLI:
         args = Mock()
         args.output = 'export.json'
         args.location = 'all'
+        args.format = 'json'
+        args.gzip = False
         
         mock_dependencies['doc_manager'].export_documents.return_value = 'export.json'
         
@@ -238,7 +355,9 @@ class TestReadwiseCLI:
         
         mock_dependencies['doc_manager'].export_documents.assert_called_once_with(
             location='all',
-            filename='export.json'
+            filename='export.json',
+            output_format='json',
+            compress=False
         )
     
     def test_list_tags(self, mock_dependencies):
@@ -289,6 +408,20 @@ class TestReadwiseCLI:
         
         mock_dependencies['tag_manager'].display_tag_stats.assert_called_once()
     
+    def test_tag_cache_flags(self, mock_dependencies):
+        """tags / tag-stats reuse the cached tag list unless --refresh is given"""
+        cli = ReadwiseCLI()
+        mock_dependencies['tag_manager'].list_tags.return_value = []
+        
+        cli.list_tags(build_parser_args(['tags']))
+        assert mock_dependencies['tag_manager'].cache_max_age == 3600
+        
+        cli.list_tags(build_parser_args(['tags', '--ttl', '60']))
+        assert mock_dependencies['tag_manager'].cache_max_age == 60
+        
+        cli.tag_stats(build_parser_args(['tag-stats', '--refresh']))
+        assert mock_dependencies['tag_manager'].cache_max_age == 0
+    
     def test_tag_documents(self, mock_dependencies):
         """Test listing documents by tag - method does not exist in CLI"""
         # This method doesn't exist in the CLI implementation
@@ -485,6 +618,427 @@ class TestReadwiseCLI:
             
             main()
             
-            # Verify CLI was created and connection was verified
+            # Verify CLI was created and connection was verified live
             mock_cli_class.assert_called_once()
-            mock_cli_instance.verify_connection.assert_called_once()
\ No newline at end of file
+            mock_cli_instance.verify_connection.assert_called_once_with()
+
+    @patch('sys.argv', ['cli.py', 'verify'])
+    def test_verify_skips_argparse(self):
+        """`verify` is dispatched without building a parser and exits 1 on failure"""
+        from cli import main
+        with patch('cli.build_parser') as mock_build_parser, \
+             patch('cli.ReadwiseCLI') as mock_cli_class:
+            mock_cli_class.return_value.verify_connection.return_value = False
+            
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+            
+            assert exc_info.value.code == 1
+            mock_build_parser.assert_not_called()
+
+    def test_setup_token_fast_path_matches_argparse(self):
+        """The argparse-free setup-token path yields the same token as argparse"""
+        from cli import _fast_path_args, build_parser
+        for argv in (['setup-token', '--token', 'abc'], ['setup-token', '--token=abc'],
+                     ['setup-token', '--token=']):
+            fast = _fast_path_args(argv)
+            assert fast.token == build_parser('setup-token').parse_args(argv).token
+        assert _fast_path_args(['setup-token', '--token', '-x']) is None
+        assert _fast_path_args(['setup-token']) is None
+        assert _fast_path_args(['verify', '--help']) is None
+
+    def test_repl_runs_commands_from_stdin(self, mock_dependencies, capsys):
+        """repl dispatches each line through the same parser and handlers"""
+        cli = ReadwiseCLI()
+        mock_dependencies['client'].verify_token.return_value = True
+        mock_dependencies['tag_manager'].list_tags.return_value = []
+        stdin = StringIO(
+            "tags --sort key\n"
+            "\n"
+            "# comment\n"
+            "bogus-command\n"
+            "setup-token --token x\n"
+            "verify\n"
+            "exit\n"
+            "tags\n"
+        )
+        
+        with patch('sys.stdin', stdin):
+            cli.repl(Mock())
+        
+        mock_dependencies['tag_manager'].list_tags.assert_called_once_with(sort_by='key')
+        captured = capsys.readouterr()
+        assert 'No tags found' in captured.out
+        assert "'setup-token' is not available in repl mode" in captured.out
+        assert 'API connection OK' in captured.out
+        assert 'invalid choice' in captured.err
+
+    def test_bulk_output_relaxes_line_buffering(self, mock_dependencies):
+        """List output runs without line buffering and restores it afterwards"""
+        import io
+        cli = ReadwiseCLI()
+        stream = io.TextIOWrapper(io.BytesIO(), encoding='utf-8', line_buffering=True)
+        seen = []
+        mock_dependencies['tag_manager'].list_tags.side_effect = (
+            lambda sort_by: seen.append(stream.line_buffering) or []
+        )
+        args = Mock()
+        args.search = None
+        args.sort = 'name'
+        
+        with patch('sys.stdout', stream):
+            cli.list_tags(args)
+        
+        assert seen == [False]
+        assert stream.line_buffering is True
+        assert stream.buffer.getvalue() == b'No tags found\n'
+
+    @patch('sys.argv', ['cli.py', 'tag-stats'])
+    def test_main_reports_command_failure(self, capsys):
+        """A failing command exits 1 with its failure prefix on stderr"""
+        from cli import main
+        with patch('cli.ReadwiseCLI') as mock_cli_class:
+            mock_cli_instance = mock_cli_class.return_value
+            mock_cli_instance.verify_connection.return_value = True
+            mock_cli_instance.tag_stats.side_effect = RuntimeError('boom')
+            
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+        
+        assert exc_info.value.code == 1
+        assert capsys.readouterr().err == 'Failed to get tag statistics: boom\n'
+
+    def test_every_handler_has_a_failure_message(self):
+        """Each dispatchable subcommand names the prefix run_command reports"""
+        from cli import build_parser, SUBPARSER_BUILDERS
+        parser = build_parser()
+        subparsers_action = next(
+            action for action in parser._actions
+            if isinstance(action, argparse._SubParsersAction)
+        )
+        for command, subparser in subparsers_action.choices.items():
+            if subparser.get_default('handler'):
+                assert subparser.get_default('failure'), command
+
+    def test_analyze_duplicates_parallel_fetch(self, mock_dependencies):
+        """--jobs > 1 without --location/--limit prefetches locations in parallel"""
+        cli = ReadwiseCLI()
+        mock_dependencies['doc_manager'].get_documents_by_location.return_value = [{'id': '1'}]
+        
+        with patch('document_deduplicator.DocumentDeduplicator') as mock_dedup_class:
+            mock_dedup_class.return_value.analyze_duplicates.return_value = {
+                'total_documents': 1, 'duplicate_groups': 0, 'total_duplicates': 0, 'groups': []
+            }
+            args = build_parser_args(['analyze-duplicates', '--jobs', '4'])
+            cli.analyze_duplicates(args)
+        
+        mock_dependencies['doc_manager'].get_documents_by_location.assert_called_once_with(jobs=4)
+        mock_dedup_class.return_value.analyze_duplicates.assert_called_once_with(
+            [{'id': '1'}], near_threshold=None)
+        mock_dependencies['doc_manager'].get_documents.assert_not_called()
+
+    def test_analyze_duplicates_near_duplicates(self, mock_dependencies):
+        """--near-duplicates passes --near-threshold down to the deduplicator"""
+        cli = ReadwiseCLI()
+        
+        with patch('document_deduplicator.DocumentDeduplicator') as mock_dedup_class:
+            mock_dedup_class.return_value.analyze_duplicates.return_value = {
+                'total_documents': 0, 'duplicate_groups': 0, 'total_duplicates': 0, 'groups': []
+            }
+            cli.analyze_duplicates(build_parser_args(
+                ['analyze-duplicates', '--near-duplicates', '--near-threshold', '0.7']))
+        
+        mock_dedup_class.return_value.analyze_duplicates.assert_called_once_with(
+            None, near_threshold=0.7)
+
+    def test_build_parser_is_memoized(self):
+        """Repeated builds for the same command reuse one parser"""
+        from cli import build_parser
+        assert build_parser('list') is build_parser('list')
+        assert build_parser('list') is not build_parser('add')
+        first = build_parser('list').parse_args(['list', '--location', 'later'])
+        second = build_parser('list').parse_args(['list'])
+        assert first.location == 'later'
+        assert second.location is None
+
+    def test_location_is_case_insensitive(self):
+        """--location is lowercased before it is checked against LOCATIONS"""
+        assert build_parser_args(['list', '--location', 'Later']).location == 'later'
+        assert build_parser_args(['update', '1', '--location', 'ARCHIVE']).location == 'archive'
+        with pytest.raises(SystemExit):
+            build_parser_args(['search', 'x', '--location', 'inbox'])
+
+    def test_jobs_must_be_positive(self):
+        """--jobs rejects values below 1 instead of fetching with no workers"""
+        assert build_parser_args(['remove-duplicates', '--jobs', '8']).jobs == 8
+        for argv in (['analyze-duplicates', '--jobs', '0'], ['remove-duplicates', '-j', '-2']):
+            with pytest.raises(SystemExit):
+                build_parser_args(argv)
+
+    def test_near_threshold_must_be_a_similarity(self):
+        """--near-threshold accepts (0, 1] and rejects 0, negatives and values above 1"""
+        assert build_parser_args(['analyze-duplicates', '--near-threshold', '1']).near_threshold == 1.0
+        assert build_parser_args(['analyze-duplicates', '--near-threshold', '0.01']).near_threshold == 0.01
+        for value in ('0', '-0.5', '1.5', 'high'):
+            with pytest.raises(SystemExit):
+                build_parser_args(['analyze-duplicates', '--near-threshold', value])
+
+    def test_execute_deletion_max_retries(self):
+        """--max-retries defaults to the deduplicator's own default and must be positive"""
+        assert build_parser_args(['execute-deletion', 'plan.csv']).max_retries is None
+        assert build_parser_args(['execute-deletion', 'plan.csv', '--max-retries', '50']).max_retries == 50
+        with pytest.raises(SystemExit):
+            build_parser_args(['execute-deletion', 'plan.csv', '--max-retries', '0'])
+
+    def test_remove_duplicates_delete_concurrency_must_be_positive(self):
+        """--delete-concurrency 0 or below is rejected by the parser, not by the thread pool"""
+        assert build_parser_args(['remove-duplicates', '--delete-concurrency', '4']).delete_concurrency == 4
+        for value in ('0', '-2'):
+            with pytest.raises(SystemExit):
+                build_parser_args(['remove-duplicates', '--delete-concurrency', value])
+
+    def test_build_parser_only_builds_requested_subcommand(self):
+        """A known command builds just its own subparser"""
+        from cli import build_parser
+        parser = build_parser('add')
+        subparsers_action = next(
+            action for action in parser._actions
+            if isinstance(action, argparse._SubParsersAction)
+        )
+        assert list(subparsers_action.choices) == ['add']
+        args = parser.parse_args(['add', 'https://example.com', '--location', 'later'])
+        assert args.url == 'https://example.com'
+        assert args.location == 'later'
+
+    def test_build_parser_builds_all_for_unknown_command(self):
+        """Help and typo paths still see every subcommand"""
+        from cli import build_parser, SUBPARSER_BUILDERS
+        for command in (None, '-h', 'lsit'):
+            subparsers_action = next(
+                action for action in build_parser(command)._actions
+                if isinstance(action, argparse._SubParsersAction)
+            )
+            assert list(subparsers_action.choices) == list(SUBPARSER_BUILDERS)
+
+    def test_module_import_does_not_load_http_stack(self):
+        """Importing cli (as `-h` does) must not pull in readwise_client/requests,
+        the deduplicator or the modules only some commands need"""
+        import os
+        import subprocess
+        import cli
+        code = (
+            "import sys, cli; "
+            "print(*(m in sys.modules for m in ('readwise_client', 'requests', "
+            "'document_deduplicator', 'concurrent.futures', 'csv')))"
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(cli.__file__)))
+        assert result.stdout.strip() == 'False False False False False', result.stderr
+
+    def test_no_command_help_matches_parser(self, monkeypatch):
+        """The static no-argument help must stay in sync with the real parser"""
+        from cli import build_parser, NO_COMMAND_HELP
+        monkeypatch.setenv('COLUMNS', '80')
+        monkeypatch.setattr(sys, 'argv', ['cli.py'])
+        assert build_parser.__wrapped__().format_help() == NO_COMMAND_HELP
+
+    def test_no_command_prints_static_help_without_argparse(self):
+        """`python cli.py` with no arguments never imports argparse"""
+        import os
+        import subprocess
+        import cli
+        code = (
+            "import sys; sys.argv = ['cli.py']; import cli; cli.main(); "
+            "sys.stderr.write(str('argparse' in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(cli.__file__)))
+        assert result.stdout == cli.NO_COMMAND_HELP
+        assert result.stderr == 'False'
+
+    def test_every_handler_names_a_cli_method(self):
+        """set_defaults(handler=...) must point at a real ReadwiseCLI method"""
+        from cli import build_parser, SUBPARSER_BUILDERS
+        sample_argv = {
+            'add': ['https://example.com'], 'search': ['kw'], 'update': ['id1'],
+            'delete': ['id1'], 'analyze-csv-duplicates': ['f.csv'],
+            'plan-deletion': ['f.csv'], 'execute-deletion': ['f.csv'],
+        }
+        for command in SUBPARSER_BUILDERS:
+            if command in ('setup-token', 'verify'):
+                continue
+            args = build_parser(command).parse_args([command] + sample_argv.get(command, []))
+            assert callable(getattr(ReadwiseCLI, args.handler)), command
+
+    @patch('sys.argv', ['cli.py', 'tag-stats'])
+    def test_main_dispatches_via_handler(self):
+        """main() calls the method named by the parsed handler"""
+        from cli import main
+        with patch('cli.ReadwiseCLI') as mock_cli_class:
+            mock_cli_instance = mock_cli_class.return_value
+            mock_cli_instance.verify_connection.return_value = True
+
+            main()
+
+            mock_cli_instance.tag_stats.assert_called_once()
+            from cli import VERIFY_CACHE_SECONDS
+            mock_cli_instance.verify_connection.assert_called_once_with(max_age=VERIFY_CACHE_SECONDS)
+
+    def test_collaborators_are_built_lazily(self, mock_dependencies):
+        """Only Config is built eagerly; managers are built once on first use"""
+        cli = ReadwiseCLI()
+
+        mock_dependencies['Config'].assert_called_once()
+        mock_dependencies['ReadwiseClient'].assert_not_called()
+        mock_dependencies['DocumentManager'].assert_not_called()
+        mock_dependencies['TagManager'].assert_not_called()
+
+        assert cli.tag_manager is cli.tag_manager
+        mock_dependencies['TagManager'].assert_called_once_with(mock_dependencies['client'])
+        mock_dependencies['ReadwiseClient'].assert_called_once_with(mock_dependencies['config'])
+        mock_dependencies['DocumentManager'].assert_not_called()
+
+    def test_list_documents_json_output(self, mock_dependencies, capsys):
+        """--format json writes the full document list as a JSON array"""
+        import json
+        docs = [{'id': '1', 'title': 'Café'}, {'id': '2', 'title': 'Doc 2'}]
+        mock_dependencies['doc_manager'].iter_documents.return_value = iter([docs])
+        cli = ReadwiseCLI()
+
+        args = Mock()
+        args.location = None
+        args.category = None
+        args.limit = None
+        args.format = 'json'
+        args.no_progress = True
+
+        cli.list_documents(args)
+
+        out = capsys.readouterr().out
+        assert json.loads(out) == docs
+        assert 'Café' in out  # ensure_ascii=False is preserved
+
+    def test_list_documents_ndjson_output(self, mock_dependencies, capsys):
+        """--format ndjson writes one document per line, even past the CSV threshold"""
+        import json
+        docs = [{'id': str(i), 'title': f'Café {i}'} for i in range(250)]
+        mock_dependencies['doc_manager'].iter_documents.return_value = iter([docs])
+        cli = ReadwiseCLI()
+
+        args = build_parser_args(['list', '--format', 'ndjson', '--no-progress'])
+        cli.list_documents(args)
+
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line) for line in lines] == docs
+        mock_dependencies['doc_manager'].export_documents_to_csv.assert_not_called()
+
+    def test_list_documents_lazy_csv_fallback(self, mock_dependencies, capsys):
+        """Text output past 200 documents hands every page, unbuffered, to the CSV export"""
+        pages = [[{'id': str(i)} for i in range(start, start + 100)] for start in (0, 100, 200)]
+        exported = []
+        mock_dependencies['doc_manager'].iter_documents.return_value = iter(pages)
+        mock_dependencies['doc_manager'].export_documents_to_csv.side_effect = (
+            lambda docs: exported.extend(docs) or 'out.csv')
+        cli = ReadwiseCLI()
+
+        cli.list_documents(build_parser_args(['list', '--no-progress']))
+
+        assert exported == pages[0] + pages[1] + pages[2]
+        assert 'Found more than 200 documents' in capsys.readouterr().out
+
+        mock_dependencies['doc_manager'].iter_documents.return_value = iter([[], []])
+        cli.list_documents(build_parser_args(['list', '--no-progress']))
+        assert capsys.readouterr().out == "No documents found matching criteria\n"
+
+    def test_search_and_tags_ndjson_output(self, mock_dependencies, capsys):
+        """search and tags accept --format json/ndjson like list"""
+        import json
+        docs = [{'id': '1', 'title': 'Café'}, {'id': '2', 'title': 'Doc 2'}]
+        tags = [{'key': 'python', 'name': 'Python'}]
+        mock_dependencies['doc_manager'].search_documents.return_value = docs
+        mock_dependencies['tag_manager'].list_tags.return_value = tags
+        cli = ReadwiseCLI()
+
+        cli.search_documents(build_parser_args(['search', 'Doc', '--format', 'ndjson']))
+        assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == docs
+
+        cli.search_documents(build_parser_args(['search', 'Doc', '--format', 'json']))
+        assert json.loads(capsys.readouterr().out) == docs
+
+        cli.list_tags(build_parser_args(['tags', '--format', 'ndjson']))
+        assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == tags
+
+    def test_search_documents_writes_in_batches(self, mock_dependencies):
+        """Large result sets are written OUTPUT_BATCH_SIZE entries per write"""
+        from cli import OUTPUT_BATCH_SIZE
+        docs = [{'id': str(i), 'title': f'T{i}'} for i in range(OUTPUT_BATCH_SIZE * 2 + 1)]
+        mock_dependencies['doc_manager'].search_documents.return_value = docs
+        cli = ReadwiseCLI()
+
+        with patch('cli.safe_write') as mock_write:
+            cli.search_documents(build_parser_args(['search', 'T']))
+
+        written = [call_args.args[0] for call_args in mock_write.call_args_list]
+        assert len(written) == 3
+        assert ''.join(written).count('   ID: ') == len(docs)
+
+    def test_plan_deletion_verbose_writes_once(self, mock_dependencies, capsys):
+        """--verbose plan details are joined into one write, not a print per line"""
+        row = lambda doc_id: {'id': doc_id, 'title': 'Doc', 'notes': 'n', 'tags': '', 'created_at': 'c'}
+        cli = ReadwiseCLI()
+
+        with patch('document_deduplicator.DocumentDeduplicator') as mock_dedup_class:
+            mock_dedup_class.return_value.analyze_deletion_plan.return_value = {
+                'csv_file': 'plan.csv', 'total_documents': 3, 'duplicate_groups': 1,
+                'total_to_delete': 2, 'total_to_keep': 1,
+                'groups': [{'group_id': 1, 'normalized_url': 'a.com/x', 'total_documents': 3,
+                            'deletion_count': 2, 'keep_document': row('k'),
+                            'delete_documents': [row('d1'), row('d2')]}],
+            }
+            mock_dedup_class.return_value.export_deletion_plan.return_value = None
+            with patch('cli.safe_write', wraps=sys.stdout.write) as mock_write:
+                cli.plan_deletion(build_parser_args(['plan-deletion', 'dupes.csv', '--verbose']))
+
+        assert mock_write.call_count == 1
+        out = capsys.readouterr().out
+        assert "  KEEP: Doc...\n    ID: k\n    Notes: Yes\n    Tags: No\n" in out
+        assert out.count('  DELETE: Doc...') == 2
+
+    def test_list_documents_text_output(self, mock_dependencies, capsys):
+        """Text output keeps the per-document layout"""
+        mock_dependencies['doc_manager'].iter_documents.return_value = iter([[
+            {'id': '1', 'title': 'First', 'source_url': 'http://a.com', 'location': 'new', 'updated_at': 'u1'},
+        ], [
+            {'id': '2', 'title': 'Second', 'url': 'http://b.com', 'location': 'later', 'updated_at': 'u2'},
+        ]])
+        cli = ReadwiseCLI()
+
+        args = Mock()
+        args.location = None
+        args.category = None
+        args.limit = None
+        args.format = 'text'
+        args.verbose = False
+        args.no_progress = True
+
+        cli.list_documents(args)
+
+        assert capsys.readouterr().out == (
+            "\n1. First\n   ID: 1\n   URL: http://a.com\n   Location: new\n   Updated: u1\n"
+            "\n2. Second\n   ID: 2\n   URL: http://b.com\n   Location: later\n   Updated: u2\n"
+        )
+
+    def test_search_documents_text_output(self, mock_dependencies, capsys):
+        """Search results keep the title/ID/URL layout"""
+        mock_dependencies['doc_manager'].search_documents.return_value = [
+            {'id': '1', 'title': 'Python Tutorial', 'source_url': 'http://a.com'},
+        ]
+        cli = ReadwiseCLI()
+
+        args = Mock()
+        args.keyword = 'python'
+        args.location = None
+
+        cli.search_documents(args)
+
+        assert capsys.readouterr().out == "\n1. Python Tutorial\n   ID: 1\n   URL: http://a.com\n"
@@ -15,6 +15,12 @@ class TestConfig:
             assert config.base_url == "https://readwise.io/api/v3"
             assert config.auth_url == "https://readwise.io/api/v2/auth/"
     
+    def test_cache_dir_follows_xdg(self, tmp_path):
+        """Cache directory lives under XDG_CACHE_HOME when it is set"""
+        with patch.dict(os.environ, {'READWISE_TOKEN': 't', 'XDG_CACHE_HOME': str(tmp_path)}):
+            config = Config()
+            assert config.cache_dir == os.path.join(str(tmp_path), 'readwise-reader')
+    
     def test_init_with_file_token(self):
         """Test config initialization with token from file"""
         with patch.dict(os.environ, {}, clear=True):
@@ -75,6 +75,19 @@ class TestDocumentDeduplicator(unittest.TestCase):
         self.assertEqual(self.deduplicator.normalize_url(""), "")
         self.assertEqual(self.deduplicator.normalize_url(None), "")
 
+    def test_normalize_url_strips_common_trackers(self):
+        """Share and newsletter trackers collapse onto the bare URL"""
+        for url in [
+            "https://www.instagram.com/p/abc/?igshid=MzRlODBiNWFlZA==",
+            "https://example.com/post?_hsenc=p2ANqtz&_hsmi=123&mkt_tok=MTM4",
+            "https://example.com/post?spm=a2c4g.11186623&yclid=42&ref_src=twsrc",
+        ]:
+            with self.subTest(url=url):
+                self.assertNotIn("?", self.deduplicator.normalize_url(url))
+        self.assertEqual(
+            self.deduplicator.normalize_url("https://example.com/watch?v=xyz&si=share123"),
+            "https://example.com/watch?v=xyz")
+
     def test_normalize_url_advanced(self):
         """Test advanced URL normalization"""
         # Test query string removal
@@ -105,6 +118,14 @@ class TestDocumentDeduplicator(unittest.TestCase):
                 self.assertEqual(result, 'fallback_result')
                 mock_simple.assert_called_once_with("test-url")
     
+    def test_normalize_title(self):
+        """ASCII (translate table) and non-ASCII (regex) titles normalize alike"""
+        from document_deduplicator import normalize_title
+        self.assertEqual(normalize_title("  Hello, World!\tSnake_case  2024 "), "hello world snake_case 2024")
+        self.assertEqual(normalize_title("Café — Déjà vu!"), "café déjà vu")
+        self.assertEqual(normalize_title("深度學習：入門指南 Part 2"), "深度學習入門指南 part 2")
+        self.assertEqual(normalize_title("!!!"), "")
+
     def test_calculate_title_similarity(self):
         """Test title similarity calculation"""
         # Test identical titles
@@ -146,6 +167,88 @@ class TestDocumentDeduplicator(unittest.TestCase):
         score = self.deduplicator.calculate_metadata_quality_score(empty_doc)
         self.assertEqual(score, 0.0)
     
+    def test_find_duplicate_groups_title_prefilter_is_exact(self):
+        """Skipping pairs by the ratio() upper bounds finds the same title groups
+        as comparing every pair with calculate_title_similarity"""
+        titles = [
+            "Python Programming Guide", "Python Programing Guide!", "Python Guide",
+            "JavaScript Tutorial", "Javascript tutorial", "A", "", None,
+            "Deep Learning with PyTorch", "Deep Learning with Pytorch 2",
+            "Notes on Rust ownership", "Notes on Go interfaces",
+        ]
+        documents = [{"id": f"doc{i}", "title": title, "source_url": f"https://example.com/{i}"}
+                     for i, title in enumerate(titles)]
+        
+        expected = []
+        grouped = set()
+        for i, doc1 in enumerate(documents):
+            if doc1["id"] in grouped:
+                continue
+            group = [doc1] + [
+                doc2 for doc2 in documents[i + 1:]
+                if doc2["id"] not in grouped and self.deduplicator.calculate_title_similarity(
+                    doc1["title"], doc2["title"]) >= self.deduplicator.similarity_threshold
+            ]
+            if len(group) > 1:
+                expected.append([doc["id"] for doc in group])
+                grouped.update(doc["id"] for doc in group)
+        
+        groups = self.deduplicator.find_duplicate_groups(documents)
+        self.assertEqual([[doc["id"] for doc in group] for group in groups], expected)
+        self.assertEqual(len(expected), 3)
+        
+        # The character-count bound used without rapidfuzz finds the same groups
+        with patch('document_deduplicator.LCSseq', None), \
+                patch('document_deduplicator.fuzz_process', None):
+            groups = self.deduplicator.find_duplicate_groups(documents)
+        self.assertEqual([[doc["id"] for doc in group] for group in groups], expected)
+    
+    def test_find_near_duplicate_groups(self):
+        """MinHash LSH groups near-identical documents and leaves others alone"""
+        summary = "A walkthrough of building command line tools with argparse and subcommands."
+        documents = [
+            {"id": "a", "title": "Building CLI tools in Python", "author": "Jane", "summary": summary},
+            {"id": "b", "title": "Building CLI tools in Python!", "author": "Jane", "summary": summary},
+            {"id": "c", "title": "Rust ownership explained", "author": "Sam",
+             "summary": "Borrowing, lifetimes and moves in the Rust compiler."},
+            {"id": "d", "title": "", "author": None, "summary": None},
+        ]
+        
+        groups = self.deduplicator.find_near_duplicate_groups(documents, threshold=0.85)
+        
+        self.assertEqual([[doc["id"] for doc in group] for group in groups], [["a", "b"]])
+        
+        # Used through find_duplicate_groups, URL groups are still found first
+        documents.append({"id": "e", "title": "Other", "source_url": "https://example.com/x"})
+        documents.append({"id": "f", "title": "Another", "source_url": "https://example.com/x?utm_source=t"})
+        groups = self.deduplicator.find_duplicate_groups(documents, near_threshold=0.85)
+        self.assertEqual([[doc["id"] for doc in group] for group in groups], [["e", "f"], ["a", "b"]])
+    
+    def test_find_near_duplicate_groups_does_not_chain(self):
+        """A~B and B~C do not put A and C in one group: members must match the anchor"""
+        from document_deduplicator import MINHASH_PERMUTATIONS
+        a = tuple(range(MINHASH_PERMUTATIONS))
+        b = tuple(-1 if i < 20 else v for i, v in enumerate(a))        # 108/128 like a
+        c = tuple(-2 if 20 <= i < 40 else v for i, v in enumerate(b))  # 108/128 like b, 88 like a
+        signatures = {"A": a, "B": b, "C": c}
+        documents = [{"id": doc_id, "title": doc_id} for doc_id in signatures]
+        
+        with patch('document_deduplicator.minhash_signature',
+                   side_effect=lambda text: signatures[text.upper()]):
+            groups = self.deduplicator.find_near_duplicate_groups(documents, threshold=0.8)
+        
+        self.assertEqual([[doc["id"] for doc in group] for group in groups], [["A", "B"]])
+    
+    def test_find_near_duplicate_groups_threshold_bounds(self):
+        """Thresholds outside (0, 1] are rejected instead of grouping everything or nothing"""
+        documents = [{"id": "a", "title": "Same title"}, {"id": "b", "title": "Same title"}]
+        groups = self.deduplicator.find_near_duplicate_groups(documents, threshold=1.0)
+        self.assertEqual([[doc["id"] for doc in group] for group in groups], [["a", "b"]])
+        for threshold in (0, -0.5, 1.01):
+            with self.subTest(threshold=threshold):
+                with self.assertRaises(ValueError):
+                    self.deduplicator.find_near_duplicate_groups(documents, threshold=threshold)
+    
     def test_find_duplicate_groups(self):
         """Test duplicate document group identification"""
         # Create test data with duplicates
@@ -201,7 +304,7 @@ class TestDocumentDeduplicator(unittest.TestCase):
         """Test duplicate analysis functionality"""
         # Set up mock
         mock_doc_manager = Mock()
-        mock_doc_manager.get_documents.return_value = self.test_documents
+        mock_doc_manager.iter_documents.return_value = iter([self.test_documents])
         mock_doc_manager_class.return_value = mock_doc_manager
         
         # Execute analysis
@@ -216,6 +319,33 @@ class TestDocumentDeduplicator(unittest.TestCase):
         # Check total document count
         self.assertEqual(analysis["total_documents"], 4)
     
+    def test_analyze_duplicates_scores_each_document_once(self):
+        """Quality scores used for ranking are reused in the report"""
+        with patch.object(self.deduplicator, 'calculate_metadata_quality_score',
+                          wraps=self.deduplicator.calculate_metadata_quality_score) as mock_score:
+            analysis = self.deduplicator.analyze_duplicates(self.test_documents)
+
+        group = analysis["groups"][0]
+        self.assertEqual(mock_score.call_count, group["documents_count"])
+        self.assertEqual(group["best_document"]["id"], "doc1")
+        self.assertGreaterEqual(group["best_document"]["quality_score"],
+                                group["duplicates_to_remove"][0]["quality_score"])
+
+    def test_analyze_duplicates_keeps_only_dedup_fields(self):
+        """Documents may be a generator; fields outside DEDUP_FIELDS are dropped"""
+        from document_deduplicator import slim_document
+        self.assertEqual(slim_document({"id": "1", "title": "T", "html": "<p>big</p>", "notes": ""}),
+                         {"id": "1", "title": "T"})
+
+        documents = ({**doc, "html": "<p>body</p>"} for doc in self.test_documents)
+        with patch.object(self.deduplicator, 'find_duplicate_groups',
+                          wraps=self.deduplicator.find_duplicate_groups) as mock_find:
+            analysis = self.deduplicator.analyze_duplicates(documents)
+
+        self.assertEqual(analysis["total_documents"], 4)
+        self.assertEqual(analysis["groups"][0]["best_document"]["id"], "doc1")
+        self.assertTrue(all("html" not in doc for doc in mock_find.call_args.args[0]))
+
     def test_analyze_duplicates_with_no_documents(self):
         """Test analysis with no documents"""
         analysis = self.deduplicator.analyze_duplicates([])
@@ -226,7 +356,7 @@ class TestDocumentDeduplicator(unittest.TestCase):
         """Test deduplication preview mode"""
         # Set up mock
         mock_doc_manager = Mock()
-        mock_doc_manager.get_documents.return_value = self.test_documents
+        mock_doc_manager.iter_documents.return_value = iter([self.test_documents])
         mock_doc_manager_class.return_value = mock_doc_manager
         
         # Execute preview
@@ -239,6 +369,89 @@ class TestDocumentDeduplicator(unittest.TestCase):
         # Confirm delete API was not called
         self.mock_client.delete_document.assert_not_called()
     
+    @patch('document_manager.DocumentManager')
+    def test_remove_duplicates_execute_uses_bulk_delete(self, mock_doc_manager_class):
+        """Confirmed deletions go through the client's concurrent bulk delete"""
+        analysis = self.deduplicator.analyze_duplicates(self.test_documents)
+        to_remove = [dup["id"] for group in analysis["groups"] for dup in group["duplicates_to_remove"]]
+        self.assertTrue(to_remove)
+        self.mock_client.delete_documents.return_value = {
+            doc_id: index > 0 for index, doc_id in enumerate(to_remove)
+        }
+        
+        result = self.deduplicator.remove_duplicates(self.test_documents, dry_run=False,
+                                                     auto_confirm=True, delete_concurrency=4)
+        
+        self.mock_client.delete_documents.assert_called_once_with(to_remove, max_workers=4)
+        self.mock_client.delete_document.assert_not_called()
+        self.assertEqual(result["removed_count"], len(to_remove) - 1)
+        self.assertEqual(result["failed_deletions"], to_remove[:1])
+    
+    def test_execute_deletion_plan_uses_bulk_delete(self):
+        """Each batch goes through the bulk delete; 404s leave the updated plan"""
+        import csv
+        import os
+        import tempfile
+        
+        def fake_delete(ids, max_workers, max_retries, errors):
+            errors['d3'] = '404 Client Error: Not Found'
+            return {doc_id: doc_id != 'd3' for doc_id in ids}
+        self.mock_client.delete_documents.side_effect = fake_delete
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            plan = os.path.join(tmp_dir, 'plan.csv')
+            with open(plan, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=['action', 'document_id', 'title',
+                                                       'source_url', 'reason', 'group_id'])
+                writer.writeheader()
+                for doc_id in ('d1', 'd2', 'd3'):
+                    writer.writerow({'action': 'DELETE', 'document_id': doc_id, 'title': doc_id,
+                                     'source_url': '', 'reason': '', 'group_id': '1'})
+            
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                result = self.deduplicator.execute_deletion_plan(plan, dry_run=False, batch_size=2)
+            finally:
+                os.chdir(cwd)
+            
+            self.assertEqual([c.args[0] for c in self.mock_client.delete_documents.call_args_list],
+                             [['d1', 'd2'], ['d3']])
+            # Plans outlast more 429s than the client's default of 3
+            from document_deduplicator import PLAN_DELETE_MAX_RETRIES
+            self.assertEqual({c.kwargs['max_retries'] for c in self.mock_client.delete_documents.call_args_list},
+                             {PLAN_DELETE_MAX_RETRIES})
+            self.mock_client.delete_document.assert_not_called()
+            self.assertEqual(result['successful_deletions'], 2)
+            self.assertEqual(result['errors'], ['Document d3: 404 Client Error: Not Found'])
+            # Deleted and 404 documents are both done, so no updated plan is needed
+            self.assertIsNone(result['updated_plan_file'])
+    
+    def test_deletion_plan_parse_is_reused_until_file_changes(self):
+        """A dry run followed by another run reuses the parsed plan; editing it rereads"""
+        import os
+        import tempfile
+        from document_deduplicator import _read_plan_rows
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            plan = os.path.join(tmp_dir, 'plan.csv')
+            with open(plan, 'w', encoding='utf-8') as f:
+                f.write('action,document_id,title,source_url,reason,group_id\n'
+                        'DELETE,d1,One,,,1\n')
+
+            _read_plan_rows.cache_clear()
+            first = self.deduplicator.execute_deletion_plan(plan, dry_run=True)
+            second = self.deduplicator.execute_deletion_plan(plan, dry_run=True)
+            self.assertEqual(first['total_candidates'], 1)
+            self.assertEqual(second['total_candidates'], 1)
+            self.assertEqual(_read_plan_rows.cache_info().misses, 1)
+
+            with open(plan, 'a', encoding='utf-8') as f:
+                f.write('DELETE,d2,Two,,,1\n')
+            third = self.deduplicator.execute_deletion_plan(plan, dry_run=True)
+            self.assertEqual(third['total_candidates'], 2)
+            self.assertEqual(_read_plan_rows.cache_info().misses, 2)
+
     def test_export_analysis_report(self):
         """Test analysis report export"""
         analysis_data = {
@@ -249,7 +462,7 @@ class TestDocumentDeduplicator(unittest.TestCase):
         }
         
         with patch('builtins.open', create=True) as mock_open:
-            with patch('json.dump') as mock_json_dump:
+            with patch('document_deduplicator.write_json') as mock_write_json:
                 filename = self.deduplicator.export_analysis_report(analysis_data, "test_report.json")
                 
                 # Check filename
@@ -257,7 +470,8 @@ class TestDocumentDeduplicator(unittest.TestCase):
                 
                 # Check that file write was called
                 mock_open.assert_called_once_with("test_report.json", 'w', encoding='utf-8')
-                mock_json_dump.assert_called_once()
+                mock_write_json.assert_called_once()
+                self.assertIs(mock_write_json.call_args[0][0], analysis_data)
 
     def test_find_csv_duplicates_advanced(self):
         """Test advanced CSV duplicate analysis"""
@@ -639,7 +853,7 @@ class TestDocumentDeduplicator(unittest.TestCase):
         }
         
         with patch('builtins.open', create=True) as mock_open:
-            with patch('csv.DictWriter') as mock_writer_class:
+            with patch('csv.writer') as mock_writer_class:
                 mock_writer = Mock()
                 mock_writer_class.return_value = mock_writer
                 
@@ -648,16 +862,55 @@ class TestDocumentDeduplicator(unittest.TestCase):
                 # Check filename
                 self.assertEqual(filename, "test_advanced.csv")
                 
-                # Check that advanced mode fields were included
+                # Check that advanced mode fields were included in the header row
                 mock_writer_class.assert_called_once()
-                call_args = mock_writer_class.call_args[1]
-                fieldnames = call_args['fieldnames']
+                fieldnames = mock_writer.writerow.call_args_list[0].args[0]
                 
                 # Advanced mode should have extra fields
                 self.assertIn('match_reason', fieldnames)
                 self.assertIn('example_urls', fieldnames)
                 self.assertIn('example_titles', fieldnames)
 
+    def test_export_csv_duplicates_rows(self):
+        """Advanced group details are written on each group's first row only"""
+        import csv
+        import os
+        import tempfile
+
+        analysis_data = {
+            "mode": "advanced",
+            "groups": [{
+                "normalized_url": "example.com/a",
+                "documents": [
+                    {"row_number": 1, "data": {"id": "1", "title": "A, \"quoted\"", "tags": "x"}},
+                    {"row_number": 4, "data": {"id": "4", "title": "A", "location": "new"}},
+                ],
+                "count": 2,
+                "example_urls": ["https://example.com/a", "https://example.com/a?x=1"],
+                "example_titles": ["A", "A"],
+                "match_reason": "Same URL (no query)"
+            }]
+        }
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "dupes.csv")
+            self.assertEqual(self.deduplicator.export_csv_duplicates(analysis_data, path), path)
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                rows = list(reader)
+
+        self.assertEqual(reader.fieldnames, [
+            'group_id', 'normalized_url', 'match_reason', 'example_urls', 'example_titles',
+            'row_number', 'id', 'title', 'source_url', 'author', 'source', 'notes', 'tags',
+            'created_at', 'location'])
+        self.assertEqual([row["id"] for row in rows], ["1", "4"])
+        self.assertEqual(rows[0]["title"], 'A, "quoted"')
+        self.assertEqual(rows[0]["match_reason"], "Same URL (no query)")
+        self.assertEqual(rows[0]["example_urls"], "https://example.com/a | https://example.com/a?x=1")
+        self.assertEqual((rows[1]["match_reason"], rows[1]["example_urls"]), ("", ""))
+        self.assertEqual((rows[1]["group_id"], rows[1]["row_number"], rows[1]["location"]), ("1", "4", "new"))
+        self.assertEqual(rows[0]["author"], "")
+
     def test_advanced_analysis_progress_tracking(self):
         """Test that advanced analysis shows progress messages"""
         import tempfile
@@ -791,6 +1044,39 @@ class TestDocumentDeduplicator(unittest.TestCase):
         finally:
             os.unlink(temp_csv_path)
 
+    def test_find_csv_duplicates_keeps_only_duplicate_rows(self):
+        """Standard CSV analysis counts every row but groups only shared URLs, in row order"""
+        import tempfile
+        import csv
+        import os
+
+        rows = [
+            {'id': '1', 'title': 'A', 'source_url': 'https://example.com/a/'},
+            {'id': '2', 'title': 'B', 'source_url': 'https://example.com/b'},
+            {'id': '3', 'title': 'C', 'source_url': ''},
+            {'id': '4', 'title': 'A again', 'source_url': 'http://EXAMPLE.com/a'},
+            {'id': '5', 'title': 'A third', 'source_url': 'https://example.com/a'},
+        ]
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+            temp_csv_path = f.name
+
+        try:
+            analysis = self.deduplicator.find_csv_duplicates(temp_csv_path)
+
+            self.assertEqual(analysis["total_documents"], 5)
+            self.assertEqual(analysis["duplicate_groups"], 1)
+            self.assertEqual(analysis["total_duplicates"], 2)
+            group = analysis["groups"][0]
+            self.assertEqual(group["normalized_url"], "example.com/a")
+            self.assertEqual([(doc["row_number"], doc["data"]["id"]) for doc in group["documents"]],
+                             [(1, "1"), (4, "4"), (5, "5")])
+        finally:
+            os.unlink(temp_csv_path)
+
     def test_intermediate_mode_export_filename_suffix(self):
         """Intermediate analyses get an _intermediate suffix when no path is given"""
         analysis_data = {
@@ -810,13 +1096,13 @@ class TestDocumentDeduplicator(unittest.TestCase):
         }
 
         with patch('builtins.open', create=True), \
-             patch('csv.DictWriter') as mock_writer_class:
+             patch('csv.writer') as mock_writer_class:
             mock_writer_class.return_value = Mock()
             filename = self.deduplicator.export_csv_duplicates(analysis_data)
 
         self.assertIn("_intermediate_", filename)
         # Intermediate exports use the standard fieldnames (no advanced extras).
-        fieldnames = mock_writer_class.call_args[1]['fieldnames']
+        fieldnames = mock_writer_class.return_value.writerow.call_args_list[0].args[0]
         self.assertNotIn('match_reason', fieldnames)
         self.assertNotIn('example_urls', fieldnames)
         self.assertNotIn('example_titles', fieldnames)
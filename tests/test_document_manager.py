@@ -2,7 +2,7 @@ import pytest
 import json
 from unittest.mock import Mock, patch, call
 from datetime import datetime
-from document_manager import DocumentManager, safe_print
+from document_manager import DocumentManager, safe_print, safe_write, write_json, write_ndjson, confirm_key, dumps_indented
 from readwise_client import ReadwiseClient
 
 
@@ -31,6 +31,57 @@ class TestDocumentManager:
         captured = capsys.readouterr()
         assert "Hello" in captured.out
     
+    def test_safe_write_block(self, capsys):
+        """safe_write emits a pre-joined block verbatim, without adding a newline"""
+        safe_write("line 1\n世界\n")
+        captured = capsys.readouterr()
+        assert captured.out == "line 1\n世界\n"
+    
+    def test_write_json_stdlib_fallback(self, capsys):
+        """Without orjson, write_json matches json.dump(indent=2) plus a newline"""
+        data = [{'id': '1', 'title': '世界'}]
+        with patch('document_manager.orjson', None):
+            write_json(data)
+        captured = capsys.readouterr()
+        assert captured.out == json.dumps(data, ensure_ascii=False, indent=2) + '\n'
+    
+    def test_write_ndjson(self, capsys):
+        """write_ndjson emits one compact JSON document per line"""
+        data = [{'id': '1', 'title': '世界'}, {'id': '2', 'title': None}]
+        with patch('document_manager.orjson', None):
+            write_ndjson(data)
+        captured = capsys.readouterr()
+        assert captured.out == '{"id": "1", "title": "世界"}\n{"id": "2", "title": null}\n'
+    
+    def test_dumps_indented(self):
+        """dumps_indented matches json.dumps(indent=2) with and without orjson"""
+        data = {'id': '1', 'title': '世界', 'tags': {'a': {'name': 'A'}}, 'n': None}
+        expected = json.dumps(data, ensure_ascii=False, indent=2)
+        assert dumps_indented(data) == expected
+        with patch('document_manager.orjson', None):
+            assert dumps_indented(data) == expected
+    
+    def test_confirm_key_line_fallback(self, capsys):
+        """Without termios/msvcrt, confirm_key reads a line; the prompt goes to stderr"""
+        from io import StringIO
+        with patch.dict('sys.modules', {'termios': None, 'msvcrt': None}), \
+             patch('sys.stdin', StringIO('yes\n')):
+            assert confirm_key('Delete? (y/N): ') is True
+        with patch.dict('sys.modules', {'termios': None, 'msvcrt': None}), \
+             patch('sys.stdin', StringIO('')):
+            assert confirm_key('Delete? (y/N): ') is False
+        captured = capsys.readouterr()
+        assert captured.out == ''
+        assert captured.err.startswith('Delete? (y/N): y\n')
+    
+    def test_write_json_orjson(self, capsys):
+        """With orjson installed the output is the same indented JSON"""
+        pytest.importorskip('orjson')
+        data = [{'id': '1', 'title': '世界', 'tags': {'a': {'name': 'A'}}}]
+        write_json(data)
+        captured = capsys.readouterr()
+        assert captured.out == json.dumps(data, ensure_ascii=False, indent=2) + '\n'
+    
     def test_add_article(self, manager, mock_client, capsys):
         """Test adding an article"""
         mock_client.save_document.return_value = {
@@ -129,6 +180,53 @@ class TestDocumentManager:
         assert result[0]['title'] == 'Document 1'
         assert result[1]['title'] == 'Document 2'
     
+    def test_iter_documents(self, manager, mock_client):
+        """Small limits take one list call; otherwise client pages are passed through"""
+        mock_client.list_documents.return_value = {'results': [{'id': '1'}, {'id': '2'}]}
+        assert list(manager.iter_documents(limit=1, show_progress=False)) == [[{'id': '1'}]]
+        
+        mock_client.iter_document_pages.return_value = iter([[{'id': '1'}], [{'id': '2'}]])
+        pages = list(manager.iter_documents(location='later', limit=150, show_progress=False))
+        assert pages == [[{'id': '1'}], [{'id': '2'}]]
+        mock_client.iter_document_pages.assert_called_once_with(
+            location='later', category=None, max_documents=150, show_progress=False)
+    
+    def test_export_documents_to_csv_from_generator(self, manager, tmp_path, capsys):
+        """CSV export consumes any iterable and reports how many rows it wrote"""
+        import csv
+        export_file = tmp_path / 'docs.csv'
+        docs = ({'id': str(i), 'title': f'Doc {i}'} for i in range(3))
+        
+        manager.export_documents_to_csv(docs, str(export_file))
+        
+        with open(export_file, newline='', encoding='utf-8') as f:
+            assert [row['id'] for row in csv.DictReader(f)] == ['0', '1', '2']
+        assert 'Exported 3 documents to CSV' in capsys.readouterr().out
+    
+    def test_get_documents_by_location(self, manager, mock_client, capsys):
+        """Each location is fetched separately with the delay scaled by jobs"""
+        mock_client.get_all_documents.side_effect = lambda location, **kwargs: [
+            {'id': f'{location}-1', 'location': location}
+        ]
+        
+        result = manager.get_documents_by_location(jobs=4)
+        
+        assert [doc['id'] for doc in result] == ['new-1', 'later-1', 'archive-1', 'feed-1']
+        assert mock_client.get_all_documents.call_count == 4
+        for call_args in mock_client.get_all_documents.call_args_list:
+            assert call_args.kwargs['delay_seconds'] == 12.0
+            assert call_args.kwargs['show_progress'] is False
+    
+    def test_get_documents_by_location_caps_workers(self, manager, mock_client, capsys):
+        """More jobs than locations cannot run more streams, so the delay is not stretched"""
+        mock_client.get_all_documents.return_value = []
+        
+        manager.get_documents_by_location(jobs=8)
+        
+        for call_args in mock_client.get_all_documents.call_args_list:
+            assert call_args.kwargs['delay_seconds'] == 12.0
+        assert 'with 4 parallel workers' in capsys.readouterr().out
+    
     def test_search_documents(self, manager, mock_client, capsys):
         """Test searching documents"""
         mock_client.get_all_documents.return_value = [
@@ -142,6 +240,18 @@ class TestDocumentManager:
         assert len(results) == 2
         assert all('python' in doc['title'].lower() for doc in results)
     
+    def test_search_documents_null_title(self, manager, mock_client, capsys):
+        """Documents with a null title are skipped, and matching ignores case"""
+        mock_client.get_all_documents.return_value = [
+            {'id': '1', 'title': None},
+            {'id': '2', 'title': 'STRASSE guide'},
+            {'id': '3'}
+        ]
+        
+        results = manager.search_documents('straße')
+        
+        assert [doc['id'] for doc in results] == ['2']
+    
     def test_search_documents_no_results(self, manager, mock_client, capsys):
         """Test searching documents with no results"""
         mock_client.get_all_documents.return_value = [
@@ -196,6 +306,18 @@ class TestDocumentManager:
             summary=None
         )
     
+    def test_move_document(self, manager, mock_client, capsys):
+        """Test moving a document validates the target location"""
+        mock_client.update_document.return_value = {'id': '12345', 'location': 'later'}
+        
+        result = manager.move_document('12345', 'later')
+        
+        assert result['location'] == 'later'
+        mock_client.update_document.assert_called_once_with('12345', location='later')
+        
+        with pytest.raises(ValueError, match=r"Valid locations: \['new', 'later', 'archive', 'feed'\]"):
+            manager.move_document('12345', 'trash')
+    
     def test_delete_document_success(self, manager, mock_client, capsys):
         """Test successful document deletion"""
         mock_client.delete_document.return_value = True
@@ -219,13 +341,45 @@ class TestDocumentManager:
         captured = capsys.readouterr()
         assert 'Delete failed' in captured.out
     
+    def test_move_documents(self, manager, mock_client, capsys):
+        """Test bulk move summary and location validation"""
+        def fake_move(ids, location, errors):
+            errors['2'] = '404 Client Error: Not Found'
+            return {'1': True, '2': False}
+        mock_client.move_documents.side_effect = fake_move
+        
+        result = manager.move_documents(['1', '2'], 'archive')
+        
+        assert result == {'1': True, '2': False}
+        mock_client.move_documents.assert_called_once()
+        assert mock_client.move_documents.call_args.args == (['1', '2'], 'archive')
+        captured = capsys.readouterr()
+        assert 'Moved 1/2 documents to archive' in captured.out
+        assert 'Move failed: 2 (404 Client Error: Not Found)' in captured.out
+        
+        with pytest.raises(ValueError):
+            manager.move_documents(['1'], 'trash')
+    
+    def test_delete_documents(self, manager, mock_client, capsys):
+        """Test bulk deletion summary"""
+        mock_client.delete_documents.return_value = {'1': True, '2': False}
+        
+        result = manager.delete_documents(['1', '2'])
+        
+        assert result == {'1': True, '2': False}
+        mock_client.delete_documents.assert_called_once_with(['1', '2'])
+        
+        captured = capsys.readouterr()
+        assert 'Deleted 1/2 documents' in captured.out
+        assert 'Delete failed: 2' in captured.out
+    
     def test_export_documents(self, manager, mock_client, tmp_path):
         """Test exporting documents to JSON"""
         mock_documents = [
             {'id': '1', 'title': 'Doc 1'},
             {'id': '2', 'title': 'Doc 2'}
         ]
-        mock_client.get_all_documents.return_value = mock_documents
+        mock_client.iter_document_pages.return_value = iter([mock_documents])
         
         # Create a temporary file path
         export_file = tmp_path / "export.json"
@@ -250,6 +404,78 @@ class TestDocumentManager:
             assert 'Doc 1' in full_content
             assert 'Doc 2' in full_content
     
+    def test_export_documents_streams_pages(self, manager, mock_client, tmp_path):
+        """Without orjson, paged JSON export matches a one-shot json.dump byte for byte"""
+        pages = [
+            [{'id': '1', 'title': 'Doc 1', 'tags': {'a': {'name': 'A'}}}],
+            [{'id': '2', 'title': '文件 "2"\nline'}, {'id': '3', 'title': None}]
+        ]
+        mock_client.iter_document_pages.return_value = iter(pages)
+        export_file = tmp_path / "export.json"
+        
+        with patch('document_manager.orjson', None):
+            manager.export_documents(filename=str(export_file))
+        
+        expected = json.dumps(pages[0] + pages[1], ensure_ascii=False, indent=2)
+        assert export_file.read_text(encoding='utf-8') == expected
+    
+    def test_export_documents_orjson_matches_stdlib(self, manager, mock_client, tmp_path):
+        """With orjson, the export holds the same JSON as the stdlib path"""
+        pytest.importorskip('orjson')
+        pages = [
+            [{'id': '1', 'title': 'Doc 1', 'reading_progress': 0.5, 'tags': {'a': {'name': 'A'}}}],
+            [{'id': '2', 'title': '文件 "2"\nline\x01', 'reading_progress': 1e-05},
+             {'id': '3', 'title': None, 'word_count': 12, 'saved': True}]
+        ]
+        outputs = []
+        for orjson_module in (None, __import__('orjson')):
+            mock_client.iter_document_pages.return_value = iter(pages)
+            export_file = tmp_path / f"export_{len(outputs)}.json"
+            with patch('document_manager.orjson', orjson_module):
+                manager.export_documents(filename=str(export_file))
+            outputs.append(export_file.read_text(encoding='utf-8'))
+        
+        assert json.loads(outputs[1]) == json.loads(outputs[0]) == pages[0] + pages[1]
+        # Only number spelling may differ: the layout is line for line the same
+        assert len(outputs[1].splitlines()) == len(outputs[0].splitlines())
+    
+    def test_export_documents_empty(self, manager, mock_client, tmp_path):
+        """An empty library still exports a valid JSON array"""
+        mock_client.iter_document_pages.return_value = iter([[]])
+        export_file = tmp_path / "export.json"
+        
+        manager.export_documents(filename=str(export_file))
+        
+        assert export_file.read_text(encoding='utf-8') == '[]'
+    
+    def test_export_documents_ndjson(self, manager, mock_client, tmp_path):
+        """NDJSON export writes one document per line"""
+        pages = [[{'id': '1', 'title': 'Doc 1'}], [{'id': '2', 'title': '世界'}]]
+        mock_client.iter_document_pages.return_value = iter(pages)
+        export_file = tmp_path / "export.ndjson"
+        
+        manager.export_documents(filename=str(export_file), output_format='ndjson')
+        
+        lines = export_file.read_text(encoding='utf-8').splitlines()
+        assert [json.loads(line) for line in lines] == pages[0] + pages[1]
+    
+    def test_export_documents_gzip(self, manager, mock_client, tmp_path, monkeypatch):
+        """--gzip appends .gz to generated names; a .gz filename implies compression"""
+        import gzip
+        pages = [[{'id': '1', 'title': '世界'}]]
+        monkeypatch.chdir(tmp_path)
+        
+        mock_client.iter_document_pages.return_value = iter(pages)
+        filename = manager.export_documents(output_format='ndjson', compress=True)
+        assert filename.endswith('.ndjson.gz')
+        with gzip.open(tmp_path / filename, 'rt', encoding='utf-8') as f:
+            assert [json.loads(line) for line in f] == pages[0]
+        
+        mock_client.iter_document_pages.return_value = iter(pages)
+        manager.export_documents(filename='export.json.gz')
+        with gzip.open(tmp_path / 'export.json.gz', 'rt', encoding='utf-8') as f:
+            assert json.load(f) == pages[0]
+    
     def test_get_statistics(self, manager, mock_client, capsys):
         """Test getting document statistics"""
         mock_documents = [
@@ -263,8 +489,6 @@ class TestDocumentManager:
         # Mock the get_documents method at the manager level
         from unittest.mock import patch
         with patch.object(manager, 'get_documents') as mock_get_docs:
-            mock_get_docs.return_value = []  # Empty for limit=1 calls
-            
             # Mock list_documents calls for count extraction
             mock_client.list_documents.side_effect = [
                 {'count': 2, 'results': []},  # new
@@ -275,6 +499,9 @@ class TestDocumentManager:
             
             stats = manager.get_stats()
             
+            # Exactly one request per location
+            mock_get_docs.assert_not_called()
+            assert mock_client.list_documents.call_count == 4
             assert stats['total'] == 3
             assert stats['new'] == 2
             assert stats['archive'] == 1
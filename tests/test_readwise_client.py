@@ -1,6 +1,8 @@
 import pytest
 import responses
 import json
+import time
+import os
 from datetime import datetime
 from unittest.mock import Mock, patch
 from readwise_client import ReadwiseClient
@@ -61,6 +63,100 @@ class TestReadwiseClient:
         
         assert client.verify_token() is False
     
+    @responses.activate
+    def test_verify_token_cached(self, client, mock_config, tmp_path):
+        """A recent successful verification is reused without a request"""
+        mock_config.cache_dir = str(tmp_path / 'cache')
+        responses.add(
+            responses.GET,
+            'https://readwise.io/api/v2/auth/',
+            status=204
+        )
+        
+        assert client.verify_token(max_age=3600) is True
+        assert client.verify_token(max_age=3600) is True
+        assert len(responses.calls) == 1
+        
+        # Without max_age the API is always called
+        assert client.verify_token() is True
+        assert len(responses.calls) == 2
+    
+    @responses.activate
+    def test_verify_token_cache_expiry_and_token_change(self, client, mock_config, tmp_path):
+        """Expired entries and entries for another token are ignored; failures are not cached"""
+        mock_config.cache_dir = str(tmp_path)
+        responses.add(
+            responses.GET,
+            'https://readwise.io/api/v2/auth/',
+            status=204
+        )
+        assert client.verify_token(max_age=3600) is True
+        
+        with patch('readwise_client.time.time', return_value=time.time() + 7200):
+            assert client.verify_token(max_age=3600) is True
+        assert len(responses.calls) == 2
+        
+        mock_config.api_token = 'other_token'
+        responses.replace(
+            responses.GET,
+            'https://readwise.io/api/v2/auth/',
+            status=401
+        )
+        assert client.verify_token(max_age=3600) is False
+        assert client.verify_token(max_age=3600) is False
+        assert len(responses.calls) == 4
+    
+    @responses.activate
+    def test_verify_cache_uses_shared_cache_format(self, client, mock_config, tmp_path):
+        """Verification is stored like the tag cache; an unreadable file means re-verifying"""
+        mock_config.cache_dir = str(tmp_path)
+        responses.add(responses.GET, 'https://readwise.io/api/v2/auth/', status=204)
+        
+        assert client.verify_token(max_age=3600) is True
+        cached = json.loads((tmp_path / 'verified.json').read_text())
+        assert cached['data'] is True
+        assert not list(tmp_path.glob('*.tmp'))
+        
+        (tmp_path / 'verified.json').write_text('{"token_ha')
+        assert client.verify_token(max_age=3600) is True
+        assert len(responses.calls) == 2
+    
+    @responses.activate
+    def test_verify_cache_cleared_by_401(self, client, mock_config, tmp_path):
+        """A 401 from any API call drops the cached verification"""
+        mock_config.cache_dir = str(tmp_path)
+        responses.add(
+            responses.GET,
+            'https://readwise.io/api/v2/auth/',
+            status=204
+        )
+        responses.add(
+            responses.GET,
+            'https://readwise.io/api/v3/list/',
+            json={'detail': 'Invalid token.'},
+            status=401
+        )
+        assert client.verify_token(max_age=3600) is True
+        assert (tmp_path / 'verified.json').exists()
+        
+        with pytest.raises(Exception):
+            client.list_documents()
+        
+        assert not (tmp_path / 'verified.json').exists()
+    
+    @responses.activate
+    def test_transient_gateway_error_is_retried(self, client):
+        """502/503/504 responses are retried on the shared session"""
+        responses.add(responses.GET, 'https://readwise.io/api/v3/list/', status=503)
+        responses.add(responses.GET, 'https://readwise.io/api/v3/list/',
+                      json={'count': 0, 'results': []}, status=200)
+        
+        with patch('urllib3.util.retry.Retry.sleep'):
+            result = client.list_documents()
+        
+        assert result == {'count': 0, 'results': []}
+        assert len(responses.calls) == 2
+    
     @responses.activate
     def test_save_document_minimal(self, client):
         """Test saving document with minimal parameters"""
@@ -242,6 +338,136 @@ class TestReadwiseClient:
         with pytest.raises(Exception):
             client.delete_document('12345')
     
+    @responses.activate
+    def test_delete_documents_concurrently(self, client, capsys):
+        """Bulk delete reports per-ID success and keeps going past failures"""
+        for document_id in ('1', '2'):
+            responses.add(
+                responses.DELETE,
+                f'https://readwise.io/api/v3/delete/{document_id}/',
+                status=204
+            )
+        responses.add(
+            responses.DELETE,
+            'https://readwise.io/api/v3/delete/3/',
+            status=404
+        )
+        
+        errors = {}
+        with patch('readwise_client.time.sleep'):
+            result = client.delete_documents(['1', '2', '3'], max_workers=3, errors=errors)
+        
+        assert result == {'1': True, '2': True, '3': False}
+        assert len(responses.calls) == 3
+        # Failures go to errors only; worker threads print nothing
+        assert list(errors) == ['3'] and '404' in errors['3']
+        assert capsys.readouterr().out == ''
+    
+    @responses.activate
+    def test_delete_documents_retries_after_429(self, client, capsys):
+        """A 429 pauses the limiter for Retry-After and the delete is retried"""
+        responses.add(
+            responses.DELETE,
+            'https://readwise.io/api/v3/delete/1/',
+            status=429,
+            headers={'Retry-After': '7'}
+        )
+        responses.add(
+            responses.DELETE,
+            'https://readwise.io/api/v3/delete/1/',
+            status=204
+        )
+        
+        with patch.object(client.delete_limiter, 'pause') as mock_pause, \
+             patch('readwise_client.time.sleep'):
+            result = client.delete_documents(['1'])
+        
+        assert result == {'1': True}
+        assert len(responses.calls) == 2
+        mock_pause.assert_called_once_with(7.0)
+        assert capsys.readouterr().out == ''
+    
+    @responses.activate
+    def test_move_documents_concurrently(self, client, capsys):
+        """Bulk move PATCHes each document's location and reports per-ID success"""
+        responses.add(
+            responses.PATCH,
+            'https://readwise.io/api/v3/update/1/',
+            json={'id': '1'},
+            status=200
+        )
+        responses.add(
+            responses.PATCH,
+            'https://readwise.io/api/v3/update/2/',
+            status=404
+        )
+        
+        errors = {}
+        with patch('readwise_client.time.sleep'):
+            result = client.move_documents(['1', '2'], 'archive', max_workers=2, errors=errors)
+        
+        assert result == {'1': True, '2': False}
+        assert all(json.loads(call.request.body) == {'location': 'archive'}
+                   for call in responses.calls)
+        # Failures go to errors only; worker threads print nothing
+        assert list(errors) == ['2'] and '404' in errors['2']
+        assert capsys.readouterr().out == ''
+    
+    def test_paced_calls_survive_non_request_errors(self, client):
+        """A worker's non-request error fails that document only, with its reason recorded"""
+        def call(document_id):
+            if document_id == '2':
+                raise ValueError('unexpected response body')
+            return True
+        
+        errors = {}
+        with patch('readwise_client.time.sleep'):
+            result = client._paced_calls(['1', '2', '3'], call, client.update_limiter,
+                                         max_workers=3, max_retries=3, errors=errors)
+        
+        assert result == {'1': True, '2': False, '3': True}
+        assert errors == {'2': 'unexpected response body'}
+    
+    def test_rate_limiter_spaces_request_starts(self):
+        """Consecutive waits are spaced by 60/requests_per_minute seconds"""
+        from readwise_client import RateLimiter
+        limiter = RateLimiter(requests_per_minute=20)
+        sleeps = []
+        with patch('readwise_client.time.monotonic', return_value=100.0), \
+             patch('readwise_client.time.sleep', side_effect=sleeps.append):
+            limiter.wait()
+            limiter.wait()
+            limiter.wait()
+            limiter.pause(30)
+            limiter.wait()
+        assert sleeps == [3.0, 6.0, 30.0]
+    
+    @responses.activate
+    def test_get_all_tags_disk_cache(self, client, mock_config, tmp_path):
+        """Tags are reused from disk within max_age; max_age=0 refetches and rewrites"""
+        mock_config.cache_dir = str(tmp_path)
+        responses.add(
+            responses.GET,
+            'https://readwise.io/api/v3/tags/',
+            json={'results': [{'key': 'python', 'name': 'Python'}], 'nextPageCursor': None},
+            status=200
+        )
+        
+        assert client.get_all_tags(max_age=3600) == [{'key': 'python', 'name': 'Python'}]
+        assert client.get_all_tags(max_age=3600) == [{'key': 'python', 'name': 'Python'}]
+        assert len(responses.calls) == 1
+        assert not [p for p in os.listdir(tmp_path) if p.endswith('.tmp')]
+        
+        client.get_all_tags(max_age=0)
+        client.get_all_tags()
+        with patch('readwise_client.time.time', return_value=time.time() + 7200):
+            client.get_all_tags(max_age=3600)
+        assert len(responses.calls) == 4
+        
+        mock_config.api_token = 'other_token'
+        client.get_all_tags(max_age=3600)
+        assert len(responses.calls) == 5
+    
     @responses.activate
     def test_list_tags(self, client):
         """Test listing tags"""
@@ -299,6 +525,54 @@ class TestReadwiseClient:
         assert results[0]['id'] == '0'
         assert results[99]['id'] == '99'
     
+    @responses.activate
+    def test_iter_document_pages(self, client):
+        """Pages are yielded one at a time and max_documents truncates the last one"""
+        responses.add(
+            responses.GET,
+            'https://readwise.io/api/v3/list/',
+            json={'nextPageCursor': 'abc', 'results': [{'id': '1'}, {'id': '2'}]},
+            status=200
+        )
+        responses.add(
+            responses.GET,
+            'https://readwise.io/api/v3/list/',
+            json={'nextPageCursor': 'def', 'results': [{'id': '3'}, {'id': '4'}]},
+            status=200
+        )
+        
+        pages = list(client.iter_document_pages(delay_seconds=0, max_documents=3,
+                                                show_progress=False))
+        
+        assert pages == [[{'id': '1'}, {'id': '2'}], [{'id': '3'}]]
+        assert len(responses.calls) == 2
+        assert 'pageCursor=abc' in responses.calls[1].request.url
+    
+    @responses.activate
+    def test_iter_document_pages_paces_from_request_start(self, client):
+        """Time spent processing a page is deducted from the delay before the next request"""
+        responses.add(
+            responses.GET,
+            'https://readwise.io/api/v3/list/',
+            json={'nextPageCursor': 'abc', 'results': [{'id': '1'}]},
+            status=200
+        )
+        responses.add(
+            responses.GET,
+            'https://readwise.io/api/v3/list/',
+            json={'nextPageCursor': None, 'results': [{'id': '2'}]},
+            status=200
+        )
+        # Page 1 is requested at t=100 and handed back for processing until t=102
+        clock = iter([100.0, 100.0, 102.0])
+        sleeps = []
+        with patch('readwise_client.time.monotonic', side_effect=lambda: next(clock, 102.0)), \
+             patch('readwise_client.time.sleep', side_effect=sleeps.append):
+            pages = list(client.iter_document_pages(delay_seconds=3.0, show_progress=False))
+        
+        assert pages == [[{'id': '1'}], [{'id': '2'}]]
+        assert sleeps == [1.0]
+    
     @responses.activate
     def test_error_handling(self, client):
         """Test error handling in API calls"""
@@ -43,6 +43,16 @@ class TestTagManager:
         assert 'Getting all tags...' in captured.out
         assert 'Found 5 tags' in captured.out
     
+    def test_get_all_tags_cache_max_age(self, mock_client, sample_tags):
+        """The configured cache age is passed through to the client"""
+        mock_client.get_all_tags.return_value = sample_tags
+        
+        TagManager(client=mock_client).get_all_tags()
+        mock_client.get_all_tags.assert_called_with(max_age=None)
+        
+        TagManager(client=mock_client, cache_max_age=600).get_all_tags()
+        mock_client.get_all_tags.assert_called_with(max_age=600)
+    
     def test_list_tags_sort_by_name(self, manager, mock_client, sample_tags):
         """Test listing tags sorted by name"""
         mock_client.get_all_tags.return_value = sample_tags